@@ -12,7 +12,8 @@
 """
 
 import requests
-import statistics
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import sys
 import time
 import csv
@@ -20,11 +21,17 @@ import os
 import datetime
 import json
 import random
+import tempfile
 import re
-from concurrent.futures import ThreadPoolExecutor
+import functools
+import heapq
+from concurrent.futures import ThreadPoolExecutor, wait
+import numpy as np
 
 # Try importing matplotlib
 try:
+    import matplotlib
+    matplotlib.use("Agg")  # headless CI runner: skip GUI backend probing
     import matplotlib.pyplot as plt
     import matplotlib.dates as mdates
     import matplotlib.ticker as ticker
@@ -33,6 +40,17 @@ except ImportError:
     GRAPH_ENABLED = False
     print("⚠️ Matplotlib not found.", file=sys.stderr)
 
+# Prefer orjson for decoding API payloads and encoding state, fall back to the stdlib
+try:
+    import orjson
+    json_loads = orjson.loads
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    json_loads = json.loads
+    def json_dumps(obj):
+        return json.dumps(obj, separators=(",", ":"))
+
 # --- CONFIGURATION ---
 # API Keys from environment variables with fallbacks
 P2P_ARMY_KEY = os.environ.get("P2P_ARMY_KEY", "YJU5RCZ2-P6VTVNNA")
@@ -46,12 +64,17 @@ AI_SUMMARY_FILE = "ai_summary.json"
 GRAPH_FILENAME = "etb_neon_terminal.png"
 GRAPH_LIGHT_FILENAME = "etb_light_terminal.png"
 HTML_FILENAME = "index.html"
+CACHE_DIR = ".cache"
 
 BURST_WAIT_TIME = 45
 TRADE_RETENTION_MINUTES = 1440  # 24 hours
 MAX_ADS_PER_SOURCE = 200
 HISTORY_POINTS = 288
 MAX_SINGLE_TRADE = 50000
+FEED_SERVER_ITEMS = 50  # first-paint feed only; the page JS re-renders the full list from allTrades
+FETCH_BUDGET_SECONDS = 90  # a snapshot never waits longer than this on a slow upstream
+OFFICIAL_RATE_TTL = 43200  # er-api publishes the ETB rate about once a day
+USDT_PEG_TTL = 3600
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
@@ -59,27 +82,93 @@ HEADERS = {
     "Accept": "application/json"
 }
 
+# Binance search body only varies by page, so it is serialized once
+BINANCE_PAYLOAD_TEMPLATE = b'{"asset":"USDT","fiat":"ETB","page":%d,"rows":20,"payTypes":[],"countries":[]}'
+
+# Shared keep-alive session: every fetcher reuses pooled TCP/TLS connections.
+# requests already sends Accept-Encoding: gzip, deflate and decodes transparently;
+# per-call headers only carry what differs (API keys/hosts) and merge over HEADERS
+SESSION = requests.Session()
+# Transient gateway errors are retried; after that the last response is returned
+# so the fetchers' own status checks can still switch to the p2p.army fallback
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16,
+                                      max_retries=Retry(total=2, backoff_factor=0.2,
+                                                        status_forcelist=[502, 503, 504],
+                                                        raise_on_status=False)))
+SESSION.headers.update(HEADERS)
+
+# --- FILE HELPERS ---
+def write_atomic(path, text):
+    """Write via a temp file + os.replace so the page server never reads a half-written file"""
+    # Unique temp name in the target's directory: concurrent writers can't collide
+    # and os.replace stays a same-filesystem rename
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix="." + os.path.basename(path) + ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(f.fileno(), 0o644)  # mkstemp creates 0600; published files must stay world-readable
+            f.write(text.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def read_cache(path):
+    with open(path, "rb") as f:
+        return json_loads(f.read())
+
+def cached(ttl):
+    """Disk-cache a no-arg fetcher in .cache/<name>.json for ttl seconds.
+    A failed fetch (None) falls back to the last cached value, however old."""
+    def decorate(fetch):
+        path = os.path.join(CACHE_DIR, fetch.__name__ + ".json")
+        
+        @functools.wraps(fetch)
+        def wrapper():
+            try:
+                if time.time() - os.path.getmtime(path) < ttl:
+                    return read_cache(path)
+            except (OSError, ValueError):
+                pass
+            value = fetch()
+            if value is not None:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                write_atomic(path, json.dumps(value))
+                return value
+            try:
+                stale = read_cache(path)
+                print(f"   ⚠️ {fetch.__name__} failed, using cached value {stale}", file=sys.stderr)
+                return stale
+            except (OSError, ValueError):
+                return None
+        return wrapper
+    return decorate
+
 # --- FETCHERS ---
+@cached(OFFICIAL_RATE_TTL)
 def fetch_official_rate():
     try:
-        return float(requests.get("https://open.er-api.com/v6/latest/USD", timeout=5).json()["rates"]["ETB"])
-    except:
+        return float(json_loads(SESSION.get("https://open.er-api.com/v6/latest/USD", timeout=5).content)["rates"]["ETB"])
+    except (requests.RequestException, ValueError, KeyError, TypeError):
         return None
 
+@cached(USDT_PEG_TTL)
 def fetch_usdt_peg():
     try:
-        return float(requests.get("https://api.coingecko.com/api/v3/simple/price?ids=tether&vs_currencies=usd", timeout=5).json()["tether"]["usd"])
-    except:
-        return 1.00
+        return float(json_loads(SESSION.get("https://api.coingecko.com/api/v3/simple/price?ids=tether&vs_currencies=usd", timeout=5).content)["tether"]["usd"])
+    except (requests.RequestException, ValueError, KeyError, TypeError):
+        return None
 
 def fetch_remittance_rates():
     """Fetch estimated remittance rates for ticker display"""
     rates = {}
     
     try:
-        # Get official NBE rate as base
-        r = requests.get("https://open.er-api.com/v6/latest/USD", timeout=5)
-        nbe_rate = r.json()["rates"]["ETB"]
+        # Get official NBE rate as base (shares the official rate cache)
+        nbe_rate = fetch_official_rate()
+        if nbe_rate is None:
+            raise ValueError("official rate unavailable")
         
         # Remittance services typically offer rates close to official + small margin
         # These are estimates - actual rates vary by amount and payment method
@@ -124,8 +213,7 @@ def fetch_binance_rapidapi(side="SELL"):
     
     headers = {
         "X-RapidAPI-Key": RAPIDAPI_KEY,
-        "X-RapidAPI-Host": "binance-p2p-api.p.rapidapi.com",
-        "Content-Type": "application/json"
+        "X-RapidAPI-Host": "binance-p2p-api.p.rapidapi.com"
     }
     
     all_ads = []
@@ -135,17 +223,8 @@ def fetch_binance_rapidapi(side="SELL"):
     use_fallback = False
     
     while page <= max_pages:
-        payload = {
-            "asset": "USDT",
-            "fiat": "ETB",
-            "page": page,
-            "rows": 20,
-            "payTypes": [],
-            "countries": []
-        }
-        
         try:
-            r = requests.post(url, headers=headers, json=payload, timeout=15)
+            r = SESSION.post(url, headers=headers, data=BINANCE_PAYLOAD_TEMPLATE % page, timeout=15)
             
             # Check for 502 or other server errors - use fallback
             if r.status_code in [502, 503, 500, 429]:
@@ -158,7 +237,7 @@ def fetch_binance_rapidapi(side="SELL"):
                 time.sleep(5)
                 continue
             
-            data = r.json()
+            data = json_loads(r.content)
             
             if data.get("code") == "000000":
                 items = data.get('data', [])
@@ -183,7 +262,7 @@ def fetch_binance_rapidapi(side="SELL"):
                                 'available': float(adv.get("surplusAmount", 0)),
                             })
                             new_count += 1
-                    except:
+                    except (AttributeError, TypeError, ValueError):
                         continue
                 
                 if new_count == 0:
@@ -213,6 +292,8 @@ def fetch_binance_rapidapi(side="SELL"):
 
 def fetch_binance_both_sides():
     """Fetch BOTH buy and sell ads from Binance"""
+    # Sides stay serialized: both walks share one RapidAPI key, and the per-page
+    # 1.5s delay plus this gap is what keeps the pair under its rate limit
     sell_ads = fetch_binance_rapidapi("SELL")
     time.sleep(2)
     buy_ads = fetch_binance_rapidapi("BUY")
@@ -234,13 +315,11 @@ def fetch_p2p_army_exchange(market, side="SELL"):
     """Universal fetcher with p2p.army - used as primary for OKX and fallback for others"""
     url = "https://p2p.army/v1/api/get_p2p_order_book"
     ads = []
-    h = HEADERS.copy()
-    h["X-APIKEY"] = P2P_ARMY_KEY
     
     try:
         payload = {"market": market, "fiat": "ETB", "asset": "USDT", "side": side, "limit": 100}
-        r = requests.post(url, headers=h, json=payload, timeout=10)
-        data = r.json()
+        r = SESSION.post(url, headers={"X-APIKEY": P2P_ARMY_KEY}, json=payload, timeout=10)
+        data = json_loads(r.content)
         
         candidates = data.get("result", data.get("data", data.get("ads", [])))
         if not candidates and isinstance(data, list):
@@ -258,7 +337,7 @@ def fetch_p2p_army_exchange(market, side="SELL"):
                                     if v > 0:
                                         vol = v
                                         break
-                                except:
+                                except (TypeError, ValueError):
                                     continue
                         
                         if vol == 0:
@@ -289,17 +368,92 @@ def fetch_p2p_army_exchange(market, side="SELL"):
     
     return ads
 
+def fetch_mexc_strategy(url, headers, api_side, side, strategy_params, seen_ids):
+    """Page through one MEXC search strategy; returns (ads, failed)
+    
+    seen_ids is shared by the strategies of one side, so a page that only
+    repeats ads an earlier strategy already returned ends pagination.
+    """
+    ads = []
+    page = 1
+    max_pages = 10
+    
+    # Only the page number changes between requests
+    params = {"tradeType": api_side, "blockTrade": "false", **strategy_params}
+    
+    while page <= max_pages:
+        params["page"] = str(page)
+        
+        try:
+            r = SESSION.get(url, headers=headers, params=params, timeout=10)
+            
+            # Check for server errors - use fallback
+            if r.status_code in [502, 503, 500]:
+                print(f"   ⚠️ MEXC RapidAPI error {r.status_code}, switching to p2p.army fallback...", file=sys.stderr)
+                return ads, True
+            
+            data = json_loads(r.content)
+            items = data.get("data", [])
+            
+            if not items:
+                break
+            
+            new_count = 0
+            for item in items:
+                try:
+                    price = item.get("price")
+                    vol = item.get("availableQuantity") or item.get("surplus_amount")
+                    if vol:
+                        vol = float(vol)
+                    else:
+                        vol = 0.0
+                    
+                    name = "MEXC User"
+                    merchant = item.get("merchant")
+                    if merchant and isinstance(merchant, dict):
+                        name = merchant.get("nickName") or merchant.get("name") or name
+                    
+                    if price:
+                        price = float(price)
+                        unique_id = f"{name}-{price}-{vol}"
+                        
+                        if vol <= 0:
+                            continue
+                        if unique_id in seen_ids:
+                            continue
+                        seen_ids.add(unique_id)
+                        ads.append({
+                            'source': 'MEXC',
+                            'ad_type': side,
+                            'advertiser': name,
+                            'price': price,
+                            'available': vol,
+                        })
+                        new_count += 1
+                except (AttributeError, TypeError, ValueError):
+                    continue
+            
+            if new_count == 0:
+                break
+            
+            page += 1
+            time.sleep(0.3)
+            
+        except Exception as e:
+            print(f"   ⚠️ MEXC request error: {e}", file=sys.stderr)
+            return ads, True
+    
+    return ads, False
+
 def fetch_mexc_rapidapi(side="SELL"):
     """Fetch MEXC P2P ads using RapidAPI with p2p.army fallback"""
     url = "https://mexc-p2p-api.p.rapidapi.com/mexc/p2p/search"
     ads = []
-    use_fallback = False
     
     try:
         headers = {
             "X-RapidAPI-Key": RAPIDAPI_KEY,
-            "X-RapidAPI-Host": "mexc-p2p-api.p.rapidapi.com",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+            "X-RapidAPI-Host": "mexc-p2p-api.p.rapidapi.com"
         }
         
         if side == "BUY":
@@ -307,85 +461,19 @@ def fetch_mexc_rapidapi(side="SELL"):
         else:
             api_side = "BUY"
         
-        seen_ids = set()
-        
         strategies = [
             {"name": "Text", "params": {"currency": "ETB", "coin": "USDT"}},
             {"name": "ID",   "params": {"currencyId": "58", "coinId": "1"}}
         ]
         
+        # Strategies run one after another on the shared RapidAPI key, like the
+        # Binance sides; the later one stops at its first page of repeats
+        seen_ids = set()
+        use_fallback = False
         for strategy in strategies:
-            page = 1
-            max_pages = 10
-            
-            while page <= max_pages:
-                params = {
-                    "tradeType": api_side,
-                    "page": str(page),
-                    "blockTrade": "false"
-                }
-                params.update(strategy["params"])
-                
-                try:
-                    r = requests.get(url, headers=headers, params=params, timeout=10)
-                    
-                    # Check for server errors - use fallback
-                    if r.status_code in [502, 503, 500]:
-                        print(f"   ⚠️ MEXC RapidAPI error {r.status_code}, switching to p2p.army fallback...", file=sys.stderr)
-                        use_fallback = True
-                        break
-                    
-                    data = r.json()
-                    items = data.get("data", [])
-                    
-                    if not items:
-                        break
-                    
-                    new_count = 0
-                    for item in items:
-                        try:
-                            price = item.get("price")
-                            vol = item.get("availableQuantity") or item.get("surplus_amount")
-                            if vol:
-                                vol = float(vol)
-                            else:
-                                vol = 0.0
-                            
-                            name = "MEXC User"
-                            merchant = item.get("merchant")
-                            if merchant and isinstance(merchant, dict):
-                                name = merchant.get("nickName") or merchant.get("name") or name
-                            
-                            if price:
-                                price = float(price)
-                                unique_id = f"{name}-{price}-{vol}"
-                                
-                                if unique_id not in seen_ids and vol > 0:
-                                    seen_ids.add(unique_id)
-                                    ads.append({
-                                        'source': 'MEXC',
-                                        'ad_type': side,
-                                        'advertiser': name,
-                                        'price': price,
-                                        'available': vol,
-                                    })
-                                    new_count += 1
-                        except:
-                            continue
-                    
-                    if new_count == 0:
-                        break
-                    
-                    page += 1
-                    time.sleep(0.3)
-                    
-                except Exception as e:
-                    print(f"   ⚠️ MEXC request error: {e}", file=sys.stderr)
-                    use_fallback = True
-                    break
-            
-            if use_fallback:
-                break
+            strategy_ads, failed = fetch_mexc_strategy(url, headers, api_side, side, strategy["params"], seen_ids)
+            ads.extend(strategy_ads)
+            use_fallback = use_fallback or failed
         
         # If RapidAPI failed, use p2p.army fallback
         if use_fallback or len(ads) == 0:
@@ -455,7 +543,7 @@ def generate_ai_summary(stats, official, trade_stats, volume_by_exchange, histor
         trend_direction = "stable"
         trend_change = 0
         if len(medians) >= 2:
-            trend_change = medians[-1] - medians[0] if medians else 0
+            trend_change = float(medians[-1] - medians[0])
             if trend_change > 2:
                 trend_direction = "increasing"
             elif trend_change < -2:
@@ -519,11 +607,11 @@ Focus on actionable insights. Be specific about price forecasts. Explain what ec
         }
         
         print(f"   📡 Calling Gemini API...", file=sys.stderr)
-        response = requests.post(url, json=payload, timeout=30)
+        response = SESSION.post(url, json=payload, timeout=30)
         print(f"   📡 Gemini API Status: {response.status_code}", file=sys.stderr)
         
         if response.status_code == 200:
-            data = response.json()
+            data = json_loads(response.content)
             
             if 'error' in data:
                 print(f"   ❌ Gemini API returned error: {data['error']}", file=sys.stderr)
@@ -554,8 +642,7 @@ Focus on actionable insights. Be specific about price forecasts. Explain what ec
                     ai_data['generated_at'] = datetime.datetime.now().isoformat()
                     ai_data['rate_at_generation'] = black_market_rate
                     
-                    with open(AI_SUMMARY_FILE, 'w') as f:
-                        json.dump(ai_data, f)
+                    write_atomic(AI_SUMMARY_FILE, json.dumps(ai_data))
                     
                     print(f"   ✅ AI Summary generated successfully!", file=sys.stderr)
                     return ai_data
@@ -640,8 +727,8 @@ def load_cached_ai_summary():
         return None
     
     try:
-        with open(AI_SUMMARY_FILE, 'r') as f:
-            data = json.load(f)
+        with open(AI_SUMMARY_FILE, 'rb') as f:
+            data = json_loads(f.read())
         
         generated_at = datetime.datetime.fromisoformat(data.get('generated_at', '2000-01-01'))
         age = datetime.datetime.now() - generated_at
@@ -657,60 +744,118 @@ def load_cached_ai_summary():
         return None
 
 # --- MARKET SNAPSHOT ---
+def results_within(ex, futures, timeout=FETCH_BUDGET_SECONDS):
+    """Collect future results within a shared time budget; late ones yield None"""
+    done, not_done = wait(futures, timeout=timeout)
+    if not_done:
+        print(f"   ⚠️ {len(not_done)} fetch(es) exceeded {timeout}s budget, skipping", file=sys.stderr)
+    # Don't block on stragglers; their threads finish in the background
+    ex.shutdown(wait=False, cancel_futures=True)
+    return [f.result() if f in done else None for f in futures]
+
+SNAPSHOT_FETCHERS = {
+    "BINANCE": fetch_binance_both_sides,
+    "MEXC": fetch_mexc_both_sides,
+    "OKX": lambda: fetch_exchange_both_sides("okx"),
+}
+
+# Fetches that overran a snapshot's budget and are still running in the background
+SNAPSHOT_STRAGGLERS = {}
+
 def capture_market_snapshot():
-    """Capture market snapshot: Binance, MEXC, OKX (NO Bybit)"""
-    with ThreadPoolExecutor(max_workers=6) as ex:
-        f_binance = ex.submit(fetch_binance_both_sides)
-        f_mexc = ex.submit(fetch_mexc_both_sides)
-        f_okx = ex.submit(fetch_exchange_both_sides, "okx")
-        f_peg = ex.submit(fetch_usdt_peg)
-        
-        binance_data = f_binance.result() or []
-        mexc_data = f_mexc.result() or []
-        okx_data = f_okx.result() or []
-        peg = f_peg.result() or 1.0
-        
-        total = len(binance_data) + len(mexc_data) + len(okx_data)
-        print(f"   📊 Collected {total} ads total (Binance, MEXC, OKX)", file=sys.stderr)
-        
-        return binance_data + mexc_data + okx_data
+    """Capture market snapshot grouped by source: Binance, MEXC, OKX (NO Bybit)
+    
+    A source that misses the budget maps to None rather than []: its ads are
+    unknown, not gone. It is not fetched again until the late call finishes,
+    so two walks never share its API key at once.
+    """
+    ex = ThreadPoolExecutor(max_workers=len(SNAPSHOT_FETCHERS))
+    futures = {}
+    for source, fetch in SNAPSHOT_FETCHERS.items():
+        straggler = SNAPSHOT_STRAGGLERS.get(source)
+        if straggler is not None and not straggler.done():
+            print(f"   ⚠️ {source} still busy with an earlier fetch, skipping", file=sys.stderr)
+            continue
+        futures[source] = ex.submit(fetch)
+    results_within(ex, list(futures.values()))
+    
+    grouped = dict.fromkeys(SNAPSHOT_FETCHERS)
+    for source, future in futures.items():
+        if future.done():
+            SNAPSHOT_STRAGGLERS.pop(source, None)
+            grouped[source] = future.result() or []
+        else:
+            SNAPSHOT_STRAGGLERS[source] = future
+    
+    total = sum(len(ads) for ads in grouped.values() if ads is not None)
+    print(f"   📊 Collected {total} ads total (Binance, MEXC, OKX)", file=sys.stderr)
+    
+    return grouped
+
+def flatten_snapshot(grouped):
+    return [ad for ads in grouped.values() if ads for ad in ads]
 
 def remove_outliers(ads, peg):
     if len(ads) < 10:
         return ads
     
-    prices = sorted([ad["price"] / peg for ad in ads])
-    p10_threshold = prices[int(len(prices) * 0.10)]
-    filtered = [ad for ad in ads if (ad["price"] / peg) > p10_threshold]
+    prices = np.fromiter((ad["price"] for ad in ads), dtype=np.float64, count=len(ads)) / peg
+    # Only the 10th-percentile order statistic is needed, so select it instead of sorting
+    k = int(len(prices) * 0.10)
+    p10_threshold = np.partition(prices, k)[k]
+    keep = prices > p10_threshold
+    filtered = [ad for ad, ok in zip(ads, keep) if ok]
     
     return filtered
 
-def load_market_state():
-    if os.path.exists(SNAPSHOT_FILE):
-        try:
-            with open(SNAPSHOT_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
-
-def save_market_state(current_ads):
-    state = {}
-    for ad in current_ads:
-        key = f"{ad['source']}|||{ad['advertiser']}|||{ad['price']}"
-        state[key] = {
+def snapshot_state(ads):
+    """Inventory per (source, advertiser, price) ad key"""
+    return {
+        (ad['source'], ad['advertiser'], ad['price']): {
             'available': ad['available'],
             'ad_type': ad.get('ad_type', 'SELL')
         }
+        for ad in ads
+    }
+
+def load_market_state():
+    if not os.path.exists(SNAPSHOT_FILE):
+        return {}
+    try:
+        with open(SNAPSHOT_FILE, 'rb') as f:
+            raw = json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
     
-    with open(SNAPSHOT_FILE, 'w') as f:
-        json.dump(state, f)
+    # Persisted keys are "source|||advertiser|||price" strings; parse each once into a tuple
+    state = {}
+    for key, data in raw.items():
+        try:
+            source, rest = key.split('|||', 1)
+            username, price = rest.rsplit('|||', 1)
+            state[(source, username, float(price))] = data
+        except ValueError:
+            continue
+    return state
+
+def save_market_state(state):
+    write_atomic(SNAPSHOT_FILE, json_dumps({f"{s}|||{u}|||{p}": data for (s, u, p), data in state.items()}))
 
-def detect_real_trades(current_ads, peg):
-    """CONSERVATIVE TRADE DETECTION - PARTIAL FILLS ONLY"""
-    prev_state = load_market_state()
+def detect_real_trades(current_ads, peg, prev_ads=None, skip_sources=()):
+    """CONSERVATIVE TRADE DETECTION - PARTIAL FILLS ONLY
+    
+    prev_ads is the previous round's snapshot_state(); it is read from
+    SNAPSHOT_FILE when not supplied. Sources in skip_sources (timed out, or
+    no baseline yet) are left out of the diff on both sides.
+    """
+    if prev_ads is None:
+        prev_ads = load_market_state()
     
-    if not prev_state:
+    if skip_sources:
+        current_ads = [ad for ad in current_ads if ad['source'] not in skip_sources]
+        prev_ads = {key: data for key, data in prev_ads.items() if key[0] not in skip_sources}
+    
+    if not prev_ads:
         print("   > First run - establishing baseline", file=sys.stderr)
         return []
     
@@ -718,58 +863,28 @@ def detect_real_trades(current_ads, peg):
     requests = []
     sources_checked = {'BINANCE': 0, 'MEXC': 0, 'OKX': 0}
     
-    current_state = {}
-    ad_lookup = {}
-    current_advertisers = {}
-    
-    for ad in current_ads:
-        key = f"{ad['source']}|||{ad['advertiser']}|||{ad['price']}"
-        current_state[key] = {
-            'available': ad['available'],
-            'ad_type': ad.get('ad_type', 'SELL')
-        }
-        ad_lookup[key] = ad
-        
-        adv_key = f"{ad['source']}|||{ad['advertiser']}"
-        if adv_key not in current_advertisers:
-            current_advertisers[adv_key] = []
-        current_advertisers[adv_key].append(ad)
-    
-    prev_advertisers = {}
-    for key, data in prev_state.items():
-        parts = key.split('|||')
-        if len(parts) >= 3:
-            adv_key = f"{parts[0]}|||{parts[1]}"
-            if adv_key not in prev_advertisers:
-                prev_advertisers[adv_key] = []
-            prev_advertisers[adv_key].append({
-                'key': key,
-                'price': float(parts[2]),
-                'data': data
-            })
+    current_state = snapshot_state(current_ads)
+    ad_lookup = {(ad['source'], ad['advertiser'], ad['price']): ad for ad in current_ads}
     
     advertisers_with_disappeared_ads = set()
     
-    disappeared_ads = set(prev_state.keys()) - set(current_state.keys())
+    disappeared_ads = prev_ads.keys() - current_state.keys()
     
     for key in disappeared_ads:
-        parts = key.split('|||')
-        if len(parts) >= 3:
-            source = parts[0].upper()
-            username = parts[1]
-            adv_key = f"{source}|||{username}"
-            advertisers_with_disappeared_ads.add(adv_key)
-            
-            prev_data = prev_state[key]
-            if isinstance(prev_data, dict):
-                vol = prev_data.get('available', 0)
-            else:
-                vol = prev_data
-            
-            if vol >= 100:
-                print(f"   ⚪ AD GONE (not counted): {source} - {username[:15]} had {vol:,.0f} USDT", file=sys.stderr)
+        source, username, _ = key
+        source = source.upper()
+        advertisers_with_disappeared_ads.add((source, username))
+        
+        prev_data = prev_ads[key]
+        if isinstance(prev_data, dict):
+            vol = prev_data.get('available', 0)
+        else:
+            vol = prev_data
+        
+        if vol >= 100:
+            print(f"   ⚪ AD GONE (not counted): {source} - {username[:15]} had {vol:,.0f} USDT", file=sys.stderr)
     
-    new_ads = set(current_state.keys()) - set(prev_state.keys())
+    new_ads = current_state.keys() - prev_ads.keys()
     
     for key in new_ads:
         ad = ad_lookup.get(key)
@@ -784,9 +899,7 @@ def detect_real_trades(current_ads, peg):
             if vol < 10:
                 continue
             
-            adv_key = f"{source}|||{ad['advertiser']}"
-            
-            if adv_key in advertisers_with_disappeared_ads:
+            if (source, ad['advertiser']) in advertisers_with_disappeared_ads:
                 continue
             
             if ad_type.upper() in ['SELL', 'SELL_AD']:
@@ -813,10 +926,10 @@ def detect_real_trades(current_ads, peg):
             continue
         
         sources_checked[source] += 1
-        key = f"{ad['source']}|||{ad['advertiser']}|||{ad['price']}"
+        key = (ad['source'], ad['advertiser'], ad['price'])
         
-        if key in prev_state:
-            prev_data = prev_state[key]
+        if key in prev_ads:
+            prev_data = prev_ads[key]
             if isinstance(prev_data, dict):
                 prev_inventory = prev_data.get('available', 0)
                 ad_type = prev_data.get('ad_type', ad.get('ad_type', 'SELL'))
@@ -868,8 +981,8 @@ def load_recent_trades():
         return []
     
     try:
-        with open(TRADES_FILE, "r") as f:
-            all_trades = json.load(f)
+        with open(TRADES_FILE, "rb") as f:
+            all_trades = json_loads(f.read())
         
         cutoff = time.time() - (TRADE_RETENTION_MINUTES * 60)
         
@@ -915,100 +1028,112 @@ def save_trades(new_trades):
     cutoff = time.time() - (TRADE_RETENTION_MINUTES * 60)
     filtered = [t for t in all_trades if t.get("timestamp", 0) > cutoff]
     
-    with open(TRADES_FILE, "w") as f:
-        json.dump(filtered, f)
+    write_atomic(TRADES_FILE, json.dumps(filtered))
     
     print(f"   > Saved {len(filtered)} events to history", file=sys.stderr)
 
 
 # --- ANALYTICS ---
+def partition_quantiles(arr, qs):
+    """Linear quantiles plus min/max from one quickselect pass (reorders arr in place)"""
+    n = arr.size
+    pos = np.asarray(qs, dtype=np.float64) * (n - 1)
+    lo = np.floor(pos).astype(np.intp)
+    hi = np.minimum(lo + 1, n - 1)
+    arr.partition(np.unique(np.concatenate(([0, n - 1], lo, hi))))
+    return arr[lo] + (arr[hi] - arr[lo]) * (pos - lo), arr[0], arr[n - 1]
+
 def analyze(prices, peg):
-    if not prices:
+    if prices is None or len(prices) == 0:
         return None
     
-    prices_float = []
-    for item in prices:
-        if isinstance(item, (int, float)):
-            prices_float.append(float(item))
-        elif isinstance(item, dict) and 'price' in item:
-            prices_float.append(float(item['price']))
-    
-    clean_prices = sorted([p for p in prices_float if 10 < p < 500])
-    if len(clean_prices) < 2:
+    if isinstance(prices, np.ndarray):
+        arr = prices.astype(np.float64, copy=False)
+    elif isinstance(prices, (list, tuple)) and all(type(p) is float for p in prices):
+        # Plain float list (checked in full, so mixed ad/price lists take the
+        # general path): size is known, so fill the array in one pass
+        arr = np.fromiter(prices, dtype=np.float64, count=len(prices))
+    else:
+        arr = np.fromiter(
+            (float(item['price']) if isinstance(item, dict) else float(item)
+             for item in prices
+             if isinstance(item, (int, float)) or (isinstance(item, dict) and 'price' in item)),
+            dtype=np.float64
+        )
+    
+    arr = arr[(arr > 10) & (arr < 500)]
+    if arr.size < 2:
         return None
     
-    adj = [p / peg for p in clean_prices]
-    n = len(adj)
-    
-    try:
-        quantiles = statistics.quantiles(adj, n=100, method="inclusive")
-        p05, q1, median, q3, p95 = quantiles[4], quantiles[24], quantiles[49], quantiles[74], quantiles[94]
-    except:
-        median = statistics.median(adj)
-        p05, q1, q3, p95 = adj[0], adj[int(n*0.25)], adj[int(n*0.75)], adj[-1]
+    arr /= peg
+    (p05, q1, median, q3, p95), lo, hi = partition_quantiles(arr, (0.05, 0.25, 0.5, 0.75, 0.95))
     
     return {
-        "median": median, "q1": q1, "q3": q3,
-        "p05": p05, "p95": p95,
-        "min": adj[0], "max": adj[-1],
-        "raw_data": adj, "count": n
+        "median": float(median), "q1": float(q1), "q3": float(q3),
+        "p05": float(p05), "p95": float(p95),
+        "min": float(lo), "max": float(hi),
+        "raw_data": arr, "count": int(arr.size)
     }
 
-def calculate_price_distribution(ads, peg, bin_size=5):
-    if not ads:
-        return []
-    
-    prices = [ad['price'] / peg for ad in ads if isinstance(ad, dict) and 'price' in ad]
-    if not prices:
-        return []
-    
-    bins = {}
-    for price in prices:
-        bin_start = int(price / bin_size) * bin_size
-        bin_key = f"{bin_start}-{bin_start + bin_size}"
-        bins[bin_key] = bins.get(bin_key, 0) + 1
-    
-    return sorted(bins.items(), key=lambda x: float(x[0].split('-')[0]))
-
 # --- HISTORY ---
-def save_to_history(stats, official):
+def save_to_history(stats, official, now=None):
     file_exists = os.path.isfile(HISTORY_FILE)
     with open(HISTORY_FILE, "a", newline="") as f:
         w = csv.writer(f)
         if not file_exists:
             w.writerow(["Timestamp", "Median", "Q1", "Q3", "Official"])
         w.writerow([
-            datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)),
             round(stats["median"], 2), round(stats["q1"], 2),
             round(stats["q3"], 2), round(official, 2) if official else 0
         ])
 
+def read_tail_lines(path, n, block=8192):
+    """Return the last n data lines of a CSV by seeking backwards from EOF (header skipped)"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b""
+        # One extra newline so the first kept line is complete
+        while pos > 0 and buf.count(b"\n") <= n:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    lines = buf.decode("utf-8").splitlines()
+    if pos == 0:
+        lines = lines[1:]  # reached the top: drop the header row
+    return [l for l in lines[-n:] if l]
+
 def load_history():
+    """Last HISTORY_POINTS rows as (datetime64[s] dates, medians, q1s, q3s, officials) arrays"""
     if not os.path.isfile(HISTORY_FILE):
-        return [], [], [], [], []
+        return np.array([], dtype="datetime64[s]"), np.empty(0), np.empty(0), np.empty(0), np.empty(0)
     
-    d, m, q1, q3, off = [], [], [], [], []
-    with open(HISTORY_FILE, "r") as f:
-        reader = csv.reader(f)
-        next(reader, None)
-        for row in reader:
+    rows = [row for row in csv.reader(read_tail_lines(HISTORY_FILE, HISTORY_POINTS)) if len(row) >= 5]
+    
+    try:
+        # Whole-column parse: 'YYYY-MM-DD HH:MM:SS' is valid datetime64 input
+        d = np.array([row[0] for row in rows], dtype="datetime64[s]")
+        values = np.array([row[1:5] for row in rows], dtype=np.float64).reshape(-1, 4)
+    except ValueError:
+        # A malformed row somewhere: fall back to per-row parsing and drop the bad ones
+        good = []
+        for row in rows:
             try:
-                d.append(datetime.datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S"))
-                m.append(float(row[1]))
-                q1.append(float(row[2]))
-                q3.append(float(row[3]))
-                off.append(float(row[4]))
-            except:
+                good.append((np.datetime64(row[0], "s"), *map(float, row[1:5])))
+            except ValueError:
                 pass
+        d = np.array([g[0] for g in good], dtype="datetime64[s]")
+        values = np.array([g[1:] for g in good], dtype=np.float64).reshape(-1, 4)
     
-    return (d[-HISTORY_POINTS:], m[-HISTORY_POINTS:], 
-            q1[-HISTORY_POINTS:], q3[-HISTORY_POINTS:], off[-HISTORY_POINTS:])
+    return d, values[:, 0], values[:, 1], values[:, 2], values[:, 3]
 
 # --- STATISTICS CALCULATOR ---
-def calculate_trade_stats(trades):
+def calculate_trade_stats(trades, now=None):
     import datetime
     
-    now = datetime.datetime.now()
+    now = datetime.datetime.fromtimestamp(now) if now is not None else datetime.datetime.now()
     hour_ago = (now - datetime.timedelta(hours=1)).timestamp()
     today_start = datetime.datetime(now.year, now.month, now.day).timestamp()
     week_ago = (now - datetime.timedelta(days=7)).timestamp()
@@ -1085,61 +1210,150 @@ def calculate_market_depth_by_price(ads, peg):
     if not ads:
         return {'supply': [], 'demand': []}
     
-    # Group ads by price bins and exchange
-    supply_by_price = {}  # SELL ads = supply
-    demand_by_price = {}  # BUY ads = demand
-    
-    for ad in ads:
-        price = ad.get('price', 0) / peg
-        vol = ad.get('available', 0)
-        source = ad.get('source', 'Unknown')
-        ad_type = ad.get('ad_type', 'SELL').upper()
-        
-        # Round to nearest integer for grouping
-        price_bin = int(round(price))
-        
-        if ad_type in ['SELL', 'SELL_AD']:
-            # Supply
-            if price_bin not in supply_by_price:
-                supply_by_price[price_bin] = {'BINANCE': 0, 'MEXC': 0, 'OKX': 0, 'total': 0}
-            supply_by_price[price_bin][source] = supply_by_price[price_bin].get(source, 0) + vol
-            supply_by_price[price_bin]['total'] += vol
-        else:
-            # Demand
-            if price_bin not in demand_by_price:
-                demand_by_price[price_bin] = {'BINANCE': 0, 'MEXC': 0, 'OKX': 0, 'total': 0}
-            demand_by_price[price_bin][source] = demand_by_price[price_bin].get(source, 0) + vol
-            demand_by_price[price_bin]['total'] += vol
-    
-    # Convert to sorted lists
-    supply_list = []
-    for price, data in sorted(supply_by_price.items()):
-        supply_list.append({
-            'price': price,
-            'BINANCE': data.get('BINANCE', 0),
-            'MEXC': data.get('MEXC', 0),
-            'OKX': data.get('OKX', 0),
-            'total': data['total']
-        })
-    
-    demand_list = []
-    for price, data in sorted(demand_by_price.items()):
-        demand_list.append({
-            'price': price,
-            'BINANCE': data.get('BINANCE', 0),
-            'MEXC': data.get('MEXC', 0),
-            'OKX': data.get('OKX', 0),
-            'total': data['total']
-        })
+    # Flatten the ads once into parallel arrays (price level, volume, exchange, side)
+    n = len(ads)
+    price_bins = np.rint(np.fromiter((ad.get('price', 0) for ad in ads), dtype=np.float64, count=n) / peg).astype(np.int64)
+    vols = np.fromiter((ad.get('available', 0) for ad in ads), dtype=np.float64, count=n)
+    sources = np.array([ad.get('source', 'Unknown') for ad in ads])
+    is_supply = np.fromiter((ad.get('ad_type', 'SELL').upper() in ['SELL', 'SELL_AD'] for ad in ads), dtype=bool, count=n)
+    
+    def depth_levels(mask):
+        # SELL ads = supply, BUY ads = demand; group by integer price level
+        levels, idx = np.unique(price_bins[mask], return_inverse=True)
+        side_vols = vols[mask]
+        side_sources = sources[mask]
+        columns = {'total': np.bincount(idx, weights=side_vols, minlength=levels.size)}
+        for exchange in ('BINANCE', 'MEXC', 'OKX'):
+            columns[exchange] = np.bincount(idx, weights=np.where(side_sources == exchange, side_vols, 0.0), minlength=levels.size)
+        
+        return [
+            {
+                'price': price,
+                'BINANCE': binance,
+                'MEXC': mexc,
+                'OKX': okx,
+                'total': total
+            }
+            for price, binance, mexc, okx, total in zip(
+                levels.tolist(), columns['BINANCE'].tolist(), columns['MEXC'].tolist(),
+                columns['OKX'].tolist(), columns['total'].tolist()
+            )
+        ]
     
-    return {'supply': supply_list, 'demand': demand_list}
+    return {'supply': depth_levels(is_supply), 'demand': depth_levels(~is_supply)}
 
 # --- HTML GENERATOR ---
-def update_website_html(stats, official, timestamp, current_ads, grouped_ads, peg, ai_summary=None, remittance_rates=None):
+# Static page assets live next to this script and are read once at import.
+# template.html is formatted with str.format_map (literal braces are doubled);
+# page.css is plain CSS spliced in as {page_css}.
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def read_asset(name):
+    with open(os.path.join(ASSET_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+PAGE_CSS = read_asset("page.css")
+HTML_TEMPLATE = read_asset("template.html")
+
+# AI analysis card, formatted with str.format_map like HTML_TEMPLATE
+AI_SUMMARY_TEMPLATE = """
+        <div style="background:linear-gradient(135deg, var(--card), rgba(10,132,255,0.1));padding:30px;border-radius:16px;margin-top:30px;border:2px solid var(--accent);">
+            <div style="display:flex;align-items:center;gap:12px;margin-bottom:20px;flex-wrap:wrap;">
+                <span style="font-size:32px;">🤖</span>
+                <div>
+                    <div style="font-size:22px;font-weight:700;color:var(--text);">AI Market Analysis & Forecast{source_badge}</div>
+                    <div style="font-size:13px;color:var(--text-secondary);">{source_text} • {generated_at}</div>
+                </div>
+                <div style="margin-left:auto;display:flex;gap:10px;flex-wrap:wrap;">
+                    <div style="background:{sentiment_color}22;padding:8px 16px;border-radius:20px;border:1px solid {sentiment_color};">
+                        <span style="font-size:18px;">{sentiment_emoji}</span>
+                        <span style="color:{sentiment_color};font-weight:700;text-transform:uppercase;">{sentiment}</span>
+                    </div>
+                    <div style="background:{confidence_color}22;padding:8px 16px;border-radius:20px;border:1px solid {confidence_color};">
+                        <span style="color:{confidence_color};font-weight:600;">Confidence: {confidence_label}</span>
+                    </div>
+                </div>
+            </div>
+            
+            <div style="background:var(--bg);padding:20px;border-radius:12px;margin-bottom:20px;">
+                <div style="font-size:16px;line-height:1.7;color:var(--text);">
+                    {summary}
+                </div>
+            </div>
+            
+            <!-- WHY THE GAP SECTION -->
+            <div style="background:linear-gradient(135deg, rgba(255,149,0,0.15), rgba(255,149,0,0.05));padding:20px;border-radius:12px;margin-bottom:20px;border:1px solid rgba(255,149,0,0.4);">
+                <div style="font-weight:700;color:var(--orange);margin-bottom:12px;font-size:18px;">📊 Why the {prem:.1f}% Gap Between Black Market & Official Rate?</div>
+                <div style="color:var(--text);line-height:1.7;font-size:15px;">{gap_explanation}</div>
+            </div>
+            
+            <!-- DRIVERS SECTION -->
+            <div style="display:grid;grid-template-columns:1fr 1fr;gap:20px;margin-bottom:20px;">
+                <div style="background:rgba(255,59,48,0.1);padding:20px;border-radius:12px;border:1px solid rgba(255,59,48,0.3);">
+                    <div style="font-weight:700;color:var(--red);margin-bottom:12px;font-size:16px;">🔴 Black Market Drivers</div>
+                    <ul style="margin:0;padding-left:20px;color:var(--text);line-height:1.6;">
+                        {bm_drivers_html}
+                    </ul>
+                </div>
+                
+                <div style="background:rgba(52,199,89,0.1);padding:20px;border-radius:12px;border:1px solid rgba(52,199,89,0.3);">
+                    <div style="font-weight:700;color:#34C759;margin-bottom:12px;font-size:16px;">🏛️ Official Rate Factors</div>
+                    <ul style="margin:0;padding-left:20px;color:var(--text);line-height:1.6;">
+                        {official_factors_html}
+                    </ul>
+                </div>
+            </div>
+            
+            <div style="display:grid;grid-template-columns:1fr 1fr;gap:20px;">
+                <div style="background:rgba(0,200,5,0.1);padding:20px;border-radius:12px;border:1px solid rgba(0,200,5,0.3);">
+                    <div style="font-weight:700;color:var(--green);margin-bottom:12px;font-size:16px;">💡 Key Insights</div>
+                    <ul style="margin:0;padding-left:20px;color:var(--text);line-height:1.6;">
+                        {insights_html}
+                    </ul>
+                </div>
+                
+                <div style="background:rgba(255,149,0,0.1);padding:20px;border-radius:12px;border:1px solid rgba(255,149,0,0.3);">
+                    <div style="font-weight:700;color:var(--orange);margin-bottom:12px;font-size:16px;">⚠️ Risk Factors</div>
+                    <ul style="margin:0;padding-left:20px;line-height:1.6;">
+                        {risks_html}
+                    </ul>
+                </div>
+            </div>
+            
+            <!-- FORECASTING SECTION -->
+            <div style="display:grid;grid-template-columns:1fr 1fr;gap:20px;margin-top:20px;">
+                <div style="background:linear-gradient(135deg, rgba(10,132,255,0.15), rgba(10,132,255,0.05));padding:20px;border-radius:12px;border:1px solid rgba(10,132,255,0.4);">
+                    <div style="font-weight:700;color:var(--accent);margin-bottom:8px;font-size:16px;">📅 Short-Term Forecast (1-7 Days)</div>
+                    <div style="color:var(--text);line-height:1.6;">{short_forecast}</div>
+                </div>
+                
+                <div style="background:linear-gradient(135deg, rgba(88,86,214,0.15), rgba(88,86,214,0.05));padding:20px;border-radius:12px;border:1px solid rgba(88,86,214,0.4);">
+                    <div style="font-weight:700;color:#5856D6;margin-bottom:8px;font-size:16px;">📆 Medium-Term Outlook (1-4 Weeks)</div>
+                    <div style="color:var(--text);line-height:1.6;">{medium_forecast}</div>
+                </div>
+            </div>
+            
+            <div style="background:var(--card);padding:20px;border-radius:12px;border:1px solid var(--border);margin-top:20px;">
+                <div style="font-weight:700;color:var(--accent);margin-bottom:8px;">💰 Recommendation</div>
+                <div style="color:var(--text);line-height:1.6;">{recommendation}</div>
+            </div>
+        </div>
+        """
+
+AI_SUMMARY_PLACEHOLDER_HTML = """
+        <div style="background:var(--card);padding:30px;border-radius:16px;margin-top:30px;border:1px solid var(--border);text-align:center;">
+            <span style="font-size:48px;">🤖</span>
+            <div style="font-size:18px;font-weight:600;margin-top:12px;color:var(--text);">AI Analysis Loading...</div>
+            <div style="font-size:14px;color:var(--text-secondary);margin-top:8px;">Gemini AI will analyze the market on next update</div>
+        </div>
+        """
+
+def update_website_html(stats, official, timestamp, current_ads, grouped_ads, peg, ai_summary=None, remittance_rates=None, per_source_stats=None, history_data=None, now=None):
     prem = ((stats["median"] - official) / official) * 100 if official else 0
-    cache_buster = int(time.time())
+    if now is None:
+        now = time.time()
     
-    dates, medians, q1s, q3s, offs = load_history()
+    dates, medians, q1s, q3s, offs = history_data if history_data is not None else load_history()
     price_change = 0
     price_change_pct = 0
     if len(medians) > 0:
@@ -1147,25 +1361,22 @@ def update_website_html(stats, official, timestamp, current_ads, grouped_ads, pe
         price_change = stats["median"] - old_median
         price_change_pct = (price_change / old_median * 100) if old_median > 0 else 0
     
-    # Calculate premiums for each historical point
-    premiums = []
-    for i in range(len(medians)):
-        if i < len(offs) and offs[i] > 0:
-            prem_val = ((medians[i] - offs[i]) / offs[i]) * 100
-            premiums.append(prem_val)
-        else:
-            premiums.append(0)
+    # Premium for each historical point (0 where no official rate was recorded)
+    has_official = offs > 0
+    premiums = np.zeros_like(medians)
+    premiums[has_official] = (medians[has_official] - offs[has_official]) / offs[has_official] * 100
     
     arrow = "↗" if price_change > 0 else "↘" if price_change < 0 else "→"
     change_color = "#00C805" if price_change > 0 else "#FF3B30" if price_change < 0 else "#8E8E93"
     
     # Source summary table (NO remittance rates here)
-    table_rows = ""
+    table_rows = []
     ticker_items = []
     
-    for source, ads in grouped_ads.items():
-        prices = [a["price"] for a in ads]
-        s = analyze(prices, peg)
+    if per_source_stats is None:
+        per_source_stats = {source: analyze([a["price"] for a in ads], peg) for source, ads in grouped_ads.items()}
+    
+    for source, s in per_source_stats.items():
         if s:
             ticker_items.append({
                 'source': source,
@@ -1174,9 +1385,10 @@ def update_website_html(stats, official, timestamp, current_ads, grouped_ads, pe
                 'type': 'exchange'
             })
             
-            table_rows += f"<tr><td class='source-col'>{source}</td><td>{s['min']:.2f}</td><td>{s['q1']:.2f}</td><td class='med-col'>{s['median']:.2f}</td><td>{s['q3']:.2f}</td><td>{s['max']:.2f}</td><td>{s['count']}</td></tr>"
+            table_rows.append(f"<tr><td class='source-col'>{source}</td><td>{s['min']:.2f}</td><td>{s['q1']:.2f}</td><td class='med-col'>{s['median']:.2f}</td><td>{s['q3']:.2f}</td><td>{s['max']:.2f}</td><td>{s['count']}</td></tr>")
         else:
-            table_rows += f"<tr><td>{source}</td><td colspan='6' style='opacity:0.5'>No Data</td></tr>"
+            table_rows.append(f"<tr><td>{source}</td><td colspan='6' style='opacity:0.5'>No Data</td></tr>")
+    table_rows = "".join(table_rows)
     
     # Add official rate to ticker
     ticker_items.append({
@@ -1201,17 +1413,6 @@ def update_website_html(stats, official, timestamp, current_ads, grouped_ads, pe
                     'color': data['color']
                 })
     
-    # Distribution table
-    distribution = calculate_price_distribution(current_ads, peg, bin_size=5)
-    dist_rows = ""
-    if distribution:
-        max_count = max([c for _, c in distribution])
-        for price_range, count in distribution:
-            style_str = "font-weight:bold;color:var(--accent)" if count == max_count else ""
-            dist_rows += f"<tr><td style='{style_str}'>{price_range} ETB</td><td style='{style_str}'>{count}</td></tr>"
-    else:
-        dist_rows = "<tr><td colspan='2' style='opacity:0.5'>No Data</td></tr>"
-    
     # Load recent trades
     recent_trades = load_recent_trades()
     buys_count = len([t for t in recent_trades if t.get('type') == 'buy'])
@@ -1220,20 +1421,20 @@ def update_website_html(stats, official, timestamp, current_ads, grouped_ads, pe
     # Chart data - only 3 exchanges now
     chart_data = {'BINANCE': [], 'MEXC': [], 'OKX': []}
     for source, ads in grouped_ads.items():
-        prices = [a["price"] / peg for a in ads if a.get("price", 0) > 0]
-        if prices and source in chart_data:
-            chart_data[source] = prices
+        if ads and source in chart_data:
+            prices = np.fromiter((a.get("price", 0) for a in ads), dtype=np.float64, count=len(ads))
+            # Every price is sent: the page derives the median line and axis range from chartData
+            chart_data[source] = (prices[prices > 0] / peg).tolist()
     
     chart_data_json = json.dumps(chart_data)
     
     # History data with premiums
-    history_data = {
-        'dates': [d.isoformat() if hasattr(d, 'isoformat') else str(d) for d in dates] if dates else [],
-        'medians': medians if medians else [],
-        'officials': [o if o else 0 for o in offs] if offs else [],
-        'premiums': premiums
-    }
-    history_data_json = json.dumps(history_data)
+    history_data_json = json.dumps({
+        'dates': np.datetime_as_string(dates, unit='s').tolist(),
+        'medians': medians.tolist(),
+        'officials': offs.tolist(),
+        'premiums': premiums.tolist()
+    })
     
     volume_by_exchange = calculate_volume_by_exchange(recent_trades)
     trade_volume_json = json.dumps(volume_by_exchange)
@@ -1242,9 +1443,9 @@ def update_website_html(stats, official, timestamp, current_ads, grouped_ads, pe
     market_depth = calculate_market_depth_by_price(current_ads, peg)
     market_depth_json = json.dumps(market_depth)
     
-    feed_html = generate_feed_html(recent_trades, peg)
+    feed_html = generate_feed_html(recent_trades, peg, now)
     
-    trade_stats = calculate_trade_stats(recent_trades)
+    trade_stats = calculate_trade_stats(recent_trades, now)
     hour_buys = trade_stats['hour_buys']
     hour_sells = trade_stats['hour_sells']
     hour_buy_volume = trade_stats['hour_buy_volume']
@@ -1262,9 +1463,9 @@ def update_website_html(stats, official, timestamp, current_ads, grouped_ads, pe
     overall_buy_volume = trade_stats['overall_buy_volume']
     overall_sell_volume = trade_stats['overall_sell_volume']
     
-    # Generate ticker HTML with remittance rates
-    ticker_html = ""
-    for item in ticker_items * 3:
+    # Generate ticker HTML with remittance rates (rendered once, repeated for the scroll loop)
+    ticker_parts = []
+    for item in ticker_items:
         change_symbol = "▲" if item['change'] > 0 else "▼" if item['change'] < 0 else "━"
         change_color = "#00C805" if item['change'] > 0 else "#FF3B30" if item['change'] < 0 else "#8E8E93"
         
@@ -1289,13 +1490,14 @@ def update_website_html(stats, official, timestamp, current_ads, grouped_ads, pe
         else:
             price_color = 'var(--text)'
         
-        ticker_html += f"""
+        ticker_parts.append(f"""
         <div class="ticker-item">
             <span class="ticker-source">{source_display}</span>
             <span class="ticker-price" style="color:{price_color}">{item['median']:.2f} ETB</span>
             <span class="ticker-change" style="color:{change_color}">{change_symbol}</span>
         </div>
-        """
+        """)
+    ticker_html = "".join(ticker_parts) * 3
     
     # AI Summary HTML at BOTTOM
     ai_summary_html = ""
@@ -1308,23 +1510,15 @@ def update_website_html(stats, official, timestamp, current_ads, grouped_ads, pe
         source_text = "Rule-Based Analysis" if is_fallback else "Powered by Google Gemini AI"
         source_badge = '<span style="background:#FF950033;color:#FF9500;padding:2px 8px;border-radius:4px;font-size:11px;margin-left:8px;">FALLBACK</span>' if is_fallback else ''
         
-        insights_html = ""
-        for insight in ai_summary.get('key_insights', []):
-            insights_html += f"<li style='margin-bottom:8px;'>{insight}</li>"
+        insights_html = "".join(f"<li style='margin-bottom:8px;'>{insight}</li>" for insight in ai_summary.get('key_insights', []))
         
-        risks_html = ""
-        for risk in ai_summary.get('risk_factors', []):
-            risks_html += f"<li style='margin-bottom:8px;color:#FF9500;'>{risk}</li>"
+        risks_html = "".join(f"<li style='margin-bottom:8px;color:#FF9500;'>{risk}</li>" for risk in ai_summary.get('risk_factors', []))
         
         # Black market drivers
-        bm_drivers_html = ""
-        for driver in ai_summary.get('black_market_drivers', []):
-            bm_drivers_html += f"<li style='margin-bottom:8px;'>{driver}</li>"
+        bm_drivers_html = "".join(f"<li style='margin-bottom:8px;'>{driver}</li>" for driver in ai_summary.get('black_market_drivers', []))
         
         # Official rate factors
-        official_factors_html = ""
-        for factor in ai_summary.get('official_rate_factors', []):
-            official_factors_html += f"<li style='margin-bottom:8px;'>{factor}</li>"
+        official_factors_html = "".join(f"<li style='margin-bottom:8px;'>{factor}</li>" for factor in ai_summary.get('official_rate_factors', []))
         
         gap_explanation = ai_summary.get('gap_explanation', 'No explanation available')
         
@@ -1334,1514 +1528,153 @@ def update_website_html(stats, official, timestamp, current_ads, grouped_ads, pe
         confidence = ai_summary.get('confidence_level', 'medium')
         confidence_color = '#00C805' if confidence == 'high' else '#FF9500' if confidence == 'medium' else '#FF3B30'
         
-        ai_summary_html = f"""
-        <div style="background:linear-gradient(135deg, var(--card), rgba(10,132,255,0.1));padding:30px;border-radius:16px;margin-top:30px;border:2px solid var(--accent);">
-            <div style="display:flex;align-items:center;gap:12px;margin-bottom:20px;flex-wrap:wrap;">
-                <span style="font-size:32px;">🤖</span>
-                <div>
-                    <div style="font-size:22px;font-weight:700;color:var(--text);">AI Market Analysis & Forecast{source_badge}</div>
-                    <div style="font-size:13px;color:var(--text-secondary);">{source_text} • {ai_summary.get('generated_at', 'recently')[:16]}</div>
+        ai_summary_html = AI_SUMMARY_TEMPLATE.format_map({
+            'source_badge': source_badge,
+            'source_text': source_text,
+            'generated_at': ai_summary.get('generated_at', 'recently')[:16],
+            'sentiment': sentiment,
+            'sentiment_color': sentiment_color,
+            'sentiment_emoji': sentiment_emoji,
+            'confidence_color': confidence_color,
+            'confidence_label': confidence.upper(),
+            'summary': ai_summary.get('summary', 'Analysis not available.'),
+            'prem': prem,
+            'gap_explanation': gap_explanation,
+            'bm_drivers_html': bm_drivers_html or '<li>High USD demand from businesses</li><li>Limited forex in official channels</li>',
+            'official_factors_html': official_factors_html or '<li>NBE monetary policy</li><li>IMF program requirements</li>',
+            'insights_html': insights_html,
+            'risks_html': risks_html,
+            'short_forecast': short_forecast,
+            'medium_forecast': medium_forecast,
+            'recommendation': ai_summary.get('recommendation', 'Not available'),
+        })
+    else:
+        ai_summary_html = AI_SUMMARY_PLACEHOLDER_HTML
+    
+    html = HTML_TEMPLATE.format_map({
+        'page_css': PAGE_CSS,
+        'ticker_html': ticker_html,
+        'median': stats['median'],
+        'change_class': 'positive' if price_change > 0 else 'negative' if price_change < 0 else '',
+        'arrow': arrow,
+        'abs_change': abs(price_change),
+        'abs_change_pct': abs(price_change_pct),
+        'prem': prem,
+        'table_rows': table_rows,
+        'buys_count': buys_count,
+        'sells_count': sells_count,
+        'feed_html': feed_html,
+        'hour_buys': hour_buys,
+        'hour_buy_volume': hour_buy_volume,
+        'today_buys': today_buys,
+        'today_buy_volume': today_buy_volume,
+        'overall_buys': overall_buys,
+        'overall_buy_volume': overall_buy_volume,
+        'hour_sells': hour_sells,
+        'hour_sell_volume': hour_sell_volume,
+        'today_sells': today_sells,
+        'today_sell_volume': today_sell_volume,
+        'overall_sells': overall_sells,
+        'overall_sell_volume': overall_sell_volume,
+        'ai_summary_html': ai_summary_html,
+        'official': official,
+        'timestamp': timestamp,
+        'recent_trades_json': json.dumps(recent_trades),
+        'chart_data_json': chart_data_json,
+        'history_data_json': history_data_json,
+        'trade_volume_json': trade_volume_json,
+        'market_depth_json': market_depth_json,
+    })
+    
+    write_atomic(HTML_FILENAME, html)
+
+# Feed rows, formatted with str.format_map (one template per row kind)
+FEED_REQUEST_ROW = """
+        <div class="feed-item request-item" data-source="{source}">
+            <div class="feed-icon" style="background:linear-gradient(135deg,{action_color}22,{action_color}11)">
+                {icon}
+            </div>
+            <div class="feed-content">
+                <div class="feed-meta">
+                    <span>{time_str}</span>
+                    <span>{age_str}</span>
                 </div>
-                <div style="margin-left:auto;display:flex;gap:10px;flex-wrap:wrap;">
-                    <div style="background:{sentiment_color}22;padding:8px 16px;border-radius:20px;border:1px solid {sentiment_color};">
-                        <span style="font-size:18px;">{sentiment_emoji}</span>
-                        <span style="color:{sentiment_color};font-weight:700;text-transform:uppercase;">{sentiment}</span>
-                    </div>
-                    <div style="background:{confidence_color}22;padding:8px 16px;border-radius:20px;border:1px solid {confidence_color};">
-                        <span style="color:{confidence_color};font-weight:600;">Confidence: {confidence.upper()}</span>
-                    </div>
+                <div class="feed-text">
+                    {emoji} <span class="feed-user">{user}</span>
+                    <span style="color:{color};font-weight:600">({source})</span>
+                    <b style="color:{action_color}">{action}</b>
+                    <span class="feed-amount">{vol_usd:,.0f} USDT</span>
+                    @ <span class="feed-price">{price:.2f} ETB</span>
                 </div>
             </div>
-            
-            <div style="background:var(--bg);padding:20px;border-radius:12px;margin-bottom:20px;">
-                <div style="font-size:16px;line-height:1.7;color:var(--text);">
-                    {ai_summary.get('summary', 'Analysis not available.')}
-                </div>
-            </div>
-            
-            <!-- WHY THE GAP SECTION -->
-            <div style="background:linear-gradient(135deg, rgba(255,149,0,0.15), rgba(255,149,0,0.05));padding:20px;border-radius:12px;margin-bottom:20px;border:1px solid rgba(255,149,0,0.4);">
-                <div style="font-weight:700;color:var(--orange);margin-bottom:12px;font-size:18px;">📊 Why the {prem:.1f}% Gap Between Black Market & Official Rate?</div>
-                <div style="color:var(--text);line-height:1.7;font-size:15px;">{gap_explanation}</div>
-            </div>
-            
-            <!-- DRIVERS SECTION -->
-            <div style="display:grid;grid-template-columns:1fr 1fr;gap:20px;margin-bottom:20px;">
-                <div style="background:rgba(255,59,48,0.1);padding:20px;border-radius:12px;border:1px solid rgba(255,59,48,0.3);">
-                    <div style="font-weight:700;color:var(--red);margin-bottom:12px;font-size:16px;">🔴 Black Market Drivers</div>
-                    <ul style="margin:0;padding-left:20px;color:var(--text);line-height:1.6;">
-                        {bm_drivers_html if bm_drivers_html else '<li>High USD demand from businesses</li><li>Limited forex in official channels</li>'}
-                    </ul>
-                </div>
-                
-                <div style="background:rgba(52,199,89,0.1);padding:20px;border-radius:12px;border:1px solid rgba(52,199,89,0.3);">
-                    <div style="font-weight:700;color:#34C759;margin-bottom:12px;font-size:16px;">🏛️ Official Rate Factors</div>
-                    <ul style="margin:0;padding-left:20px;color:var(--text);line-height:1.6;">
-                        {official_factors_html if official_factors_html else '<li>NBE monetary policy</li><li>IMF program requirements</li>'}
-                    </ul>
-                </div>
-            </div>
-            
-            <div style="display:grid;grid-template-columns:1fr 1fr;gap:20px;">
-                <div style="background:rgba(0,200,5,0.1);padding:20px;border-radius:12px;border:1px solid rgba(0,200,5,0.3);">
-                    <div style="font-weight:700;color:var(--green);margin-bottom:12px;font-size:16px;">💡 Key Insights</div>
-                    <ul style="margin:0;padding-left:20px;color:var(--text);line-height:1.6;">
-                        {insights_html}
-                    </ul>
-                </div>
-                
-                <div style="background:rgba(255,149,0,0.1);padding:20px;border-radius:12px;border:1px solid rgba(255,149,0,0.3);">
-                    <div style="font-weight:700;color:var(--orange);margin-bottom:12px;font-size:16px;">⚠️ Risk Factors</div>
-                    <ul style="margin:0;padding-left:20px;line-height:1.6;">
-                        {risks_html}
-                    </ul>
-                </div>
-            </div>
-            
-            <!-- FORECASTING SECTION -->
-            <div style="display:grid;grid-template-columns:1fr 1fr;gap:20px;margin-top:20px;">
-                <div style="background:linear-gradient(135deg, rgba(10,132,255,0.15), rgba(10,132,255,0.05));padding:20px;border-radius:12px;border:1px solid rgba(10,132,255,0.4);">
-                    <div style="font-weight:700;color:var(--accent);margin-bottom:8px;font-size:16px;">📅 Short-Term Forecast (1-7 Days)</div>
-                    <div style="color:var(--text);line-height:1.6;">{short_forecast}</div>
-                </div>
-                
-                <div style="background:linear-gradient(135deg, rgba(88,86,214,0.15), rgba(88,86,214,0.05));padding:20px;border-radius:12px;border:1px solid rgba(88,86,214,0.4);">
-                    <div style="font-weight:700;color:#5856D6;margin-bottom:8px;font-size:16px;">📆 Medium-Term Outlook (1-4 Weeks)</div>
-                    <div style="color:var(--text);line-height:1.6;">{medium_forecast}</div>
-                </div>
-            </div>
-            
-            <div style="background:var(--card);padding:20px;border-radius:12px;border:1px solid var(--border);margin-top:20px;">
-                <div style="font-weight:700;color:var(--accent);margin-bottom:8px;">💰 Recommendation</div>
-                <div style="color:var(--text);line-height:1.6;">{ai_summary.get('recommendation', 'Not available')}</div>
-            </div>
-        </div>
-        """
-    else:
-        ai_summary_html = """
-        <div style="background:var(--card);padding:30px;border-radius:16px;margin-top:30px;border:1px solid var(--border);text-align:center;">
-            <span style="font-size:48px;">🤖</span>
-            <div style="font-size:18px;font-weight:600;margin-top:12px;color:var(--text);">AI Analysis Loading...</div>
-            <div style="font-size:14px;color:var(--text-secondary);margin-top:8px;">Gemini AI will analyze the market on next update</div>
         </div>
         """
-    
-    html = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta http-equiv="Cache-Control" content="no-cache, no-store, must-revalidate">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <meta http-equiv="refresh" content="300">
-        <title>ETB Market v42.9 - AI Powered + Remittance Rates</title>
-        <script src="https://cdn.plot.ly/plotly-2.27.0.min.js"></script>
-        <style>
-            * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-            
-            :root {{
-                --bg: #000000;
-                --card: #1C1C1E;
-                --card-hover: #2C2C2E;
-                --text: #FFFFFF;
-                --text-secondary: #8E8E93;
-                --green: #00C805;
-                --red: #FF3B30;
-                --orange: #FF9500;
-                --border: #38383A;
-                --accent: #0A84FF;
-            }}
-            
-            [data-theme="light"] {{
-                --bg: #F2F2F7;
-                --card: #FFFFFF;
-                --card-hover: #F9F9F9;
-                --text: #000000;
-                --text-secondary: #8E8E93;
-                --green: #34C759;
-                --red: #FF3B30;
-                --orange: #FF9500;
-                --border: #C6C6C8;
-                --accent: #007AFF;
-            }}
-            
-            body {{
-                background: var(--bg);
-                color: var(--text);
-                font-family: -apple-system, BlinkMacSystemFont, 'SF Pro Display', sans-serif;
-                overflow-x: hidden;
-                transition: background 0.3s ease;
-            }}
-            
-            .ticker-wrapper {{
-                width: 100%;
-                overflow: hidden;
-                background: var(--card);
-                border-bottom: 2px solid var(--accent);
-                padding: 12px 0;
-            }}
-            
-            .ticker {{
-                display: flex;
-                animation: scroll 50s linear infinite;
-                white-space: nowrap;
-            }}
-            
-            @keyframes scroll {{
-                0% {{ transform: translateX(0); }}
-                100% {{ transform: translateX(-33.333%); }}
-            }}
-            
-            .ticker-item {{
-                display: inline-flex;
-                align-items: center;
-                gap: 12px;
-                padding: 0 30px;
-                border-right: 1px solid var(--border);
-            }}
-            
-            .ticker-source {{
-                font-weight: 700;
-                color: var(--accent);
-                font-size: 14px;
-            }}
-            
-            .ticker-price {{
-                font-weight: 600;
-                color: var(--text);
-                font-size: 14px;
-            }}
-            
-            .ticker-change {{
-                font-weight: 700;
-                font-size: 16px;
-            }}
-            
-            .container {{
-                max-width: 1400px;
-                margin: 0 auto;
-                padding: 20px;
-            }}
-            
-            header {{
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-                padding: 20px 0;
-                border-bottom: 1px solid var(--border);
-                margin-bottom: 30px;
-            }}
-            
-            .logo {{
-                font-size: 24px;
-                font-weight: 700;
-                letter-spacing: -0.5px;
-            }}
-            
-            .theme-toggle {{
-                background: var(--card);
-                border: 1px solid var(--border);
-                border-radius: 20px;
-                padding: 8px 16px;
-                cursor: pointer;
-                transition: all 0.2s ease;
-                color: var(--text);
-                font-size: 14px;
-            }}
-            
-            .theme-toggle:hover {{
-                background: var(--card-hover);
-                transform: translateY(-1px);
-            }}
-            
-            .main-grid {{
-                display: grid;
-                grid-template-columns: 1fr 400px;
-                gap: 20px;
-                margin-bottom: 30px;
-            }}
-            
-            .price-card {{
-                background: var(--card);
-                border-radius: 16px;
-                padding: 30px;
-                border: 1px solid var(--border);
-                transition: all 0.3s ease;
-            }}
-            
-            .price-card:hover {{
-                border-color: var(--accent);
-                box-shadow: 0 8px 30px rgba(10, 132, 255, 0.15);
-            }}
-            
-            .price-label {{
-                color: var(--text-secondary);
-                font-size: 14px;
-                font-weight: 500;
-                letter-spacing: 0.5px;
-                text-transform: uppercase;
-                margin-bottom: 10px;
-            }}
-            
-            .price-value {{
-                font-size: 52px;
-                font-weight: 700;
-                letter-spacing: -2px;
-                margin-bottom: 15px;
-                line-height: 1;
-            }}
-            
-            .price-change {{
-                display: inline-flex;
-                align-items: center;
-                gap: 6px;
-                font-size: 18px;
-                font-weight: 600;
-                padding: 6px 12px;
-                border-radius: 8px;
-            }}
-            
-            .price-change.positive {{
-                background: rgba(0, 200, 5, 0.1);
-                color: var(--green);
-            }}
-            
-            .price-change.negative {{
-                background: rgba(255, 59, 48, 0.1);
-                color: var(--red);
-            }}
-            
-            .arrow {{
-                font-size: 24px;
-                line-height: 1;
-            }}
-            
-            .premium-badge {{
-                display: inline-block;
-                background: linear-gradient(135deg, var(--orange), #FF6B00);
-                color: white;
-                padding: 8px 16px;
-                border-radius: 20px;
-                font-size: 13px;
-                font-weight: 600;
-                margin-top: 15px;
-            }}
-            
-            .time-selector {{
-                display: flex;
-                gap: 8px;
-                padding: 20px;
-                background: var(--card);
-                border-radius: 16px;
-                border: 1px solid var(--border);
-                overflow-x: auto;
-            }}
-            
-            .time-btn {{
-                background: transparent;
-                border: none;
-                color: var(--text-secondary);
-                padding: 8px 16px;
-                border-radius: 8px;
-                cursor: pointer;
-                font-size: 14px;
-                font-weight: 600;
-                transition: all 0.2s ease;
-                white-space: nowrap;
-            }}
-            
-            .time-btn:hover {{
-                background: var(--card-hover);
-                color: var(--text);
-            }}
-            
-            .time-btn.active {{
-                background: var(--accent);
-                color: white;
-            }}
-            
-            .trend-btn {{
-                background: transparent;
-                border: 1px solid var(--border);
-                color: var(--text-secondary);
-                padding: 6px 14px;
-                border-radius: 8px;
-                cursor: pointer;
-                font-size: 13px;
-                font-weight: 600;
-                transition: all 0.2s ease;
-            }}
-            
-            .trend-btn:hover {{
-                background: var(--card-hover);
-                color: var(--text);
-            }}
-            
-            .trend-btn.active {{
-                background: var(--accent);
-                color: white;
-                border-color: var(--accent);
-            }}
-            
-            .chart-card {{
-                background: var(--card);
-                border-radius: 16px;
-                padding: 20px;
-                border: 1px solid var(--border);
-                margin-bottom: 20px;
-            }}
-            
-            .plotly-chart {{
-                width: 100%;
-                height: 350px;
-                border-radius: 12px;
-            }}
-            
-            .chart-title {{
-                font-size: 16px;
-                font-weight: 600;
-                color: var(--text);
-                margin-bottom: 12px;
-                display: flex;
-                align-items: center;
-                gap: 8px;
-            }}
-            
-            .table-card {{
-                background: var(--card);
-                border-radius: 16px;
-                padding: 20px;
-                border: 1px solid var(--border);
-                margin-bottom: 20px;
-            }}
-            
-            .table-card h3 {{
-                font-size: 18px;
-                font-weight: 700;
-                margin-bottom: 15px;
-                color: var(--text);
-            }}
-            
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                font-size: 14px;
-            }}
-            
-            th {{
-                text-align: left;
-                padding: 12px;
-                color: var(--text-secondary);
-                font-weight: 600;
-                font-size: 12px;
-                text-transform: uppercase;
-                letter-spacing: 0.5px;
-                border-bottom: 1px solid var(--border);
-            }}
-            
-            td {{
-                padding: 12px;
-                color: var(--text);
-                border-bottom: 1px solid var(--border);
-            }}
-            
-            tr:last-child td {{
-                border-bottom: none;
-            }}
-            
-            .source-col {{
-                font-weight: 600;
-                color: #00ff9d;
-            }}
-            
-            .med-col {{
-                color: #ff0066;
-                font-weight: 700;
-            }}
-            
-            .feed-panel {{
-                background: var(--card);
-                border-radius: 16px;
-                border: 1px solid var(--border);
-                height: fit-content;
-                position: sticky;
-                top: 20px;
-            }}
-            
-            .feed-header {{
-                padding: 20px;
-                border-bottom: 1px solid var(--border);
-            }}
-            
-            .feed-title {{
-                font-size: 18px;
-                font-weight: 700;
-                margin-bottom: 15px;
-            }}
-            
-            .feed-container {{
-                max-height: 800px;
-                overflow-y: auto;
-                padding: 10px;
-            }}
-            
-            .feed-container::-webkit-scrollbar {{
-                width: 6px;
-            }}
-            
-            .feed-container::-webkit-scrollbar-thumb {{
-                background: var(--border);
-                border-radius: 3px;
-            }}
-            
-            .feed-item {{
-                display: flex;
-                align-items: flex-start;
-                gap: 12px;
-                padding: 12px;
-                border-radius: 12px;
-                margin-bottom: 8px;
-                transition: all 0.2s ease;
-                cursor: pointer;
-            }}
-            
-            .feed-item:hover {{
-                background: var(--card-hover);
-            }}
-            
-            .feed-icon {{
-                width: 36px;
-                height: 36px;
-                border-radius: 50%;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                font-size: 18px;
-                flex-shrink: 0;
-                font-weight: 600;
-            }}
-            
-            .feed-icon.buy {{
-                background: rgba(0, 200, 5, 0.15);
-                color: var(--green);
-            }}
-            
-            .feed-icon.sell {{
-                background: rgba(255, 59, 48, 0.15);
-                color: var(--red);
-            }}
-            
-            .feed-content {{
-                flex: 1;
-                font-size: 13px;
-                line-height: 1.5;
-            }}
-            
-            .feed-meta {{
-                display: flex;
-                justify-content: space-between;
-                color: var(--text-secondary);
-                font-size: 12px;
-                margin-bottom: 4px;
-            }}
-            
-            .feed-text {{
-                color: var(--text);
-            }}
-            
-            .feed-user {{
-                font-weight: 600;
-                font-family: 'Courier New', monospace;
-                color: #00ff9d;
-            }}
-            
-            .feed-amount {{
-                font-weight: 700;
-                color: #00bfff;
-            }}
-            
-            .feed-price {{
-                font-weight: 600;
-            }}
-            
-            .stats-panel {{
-                background: var(--card);
-                border-radius: 12px;
-                padding: 20px;
-                margin: 20px;
-                border: 1px solid var(--border);
-            }}
-            
-            .stats-title {{
-                font-size: 18px;
-                font-weight: 700;
-                color: var(--text);
-                margin-bottom: 20px;
-                text-align: center;
-            }}
-            
-            .stats-section {{
-                margin-bottom: 24px;
-            }}
-            
-            .stats-section:last-child {{
-                margin-bottom: 0;
-            }}
-            
-            .stats-section-title {{
-                font-size: 16px;
-                font-weight: 600;
-                color: var(--text);
-                margin-bottom: 12px;
-                padding-bottom: 8px;
-                border-bottom: 1px solid var(--border);
-            }}
-            
-            .stats-grid {{
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
-                gap: 12px;
-            }}
-            
-            .stat-card {{
-                background: rgba(10, 132, 255, 0.05);
-                border: 1px solid var(--border);
-                border-radius: 10px;
-                padding: 16px;
-                text-align: center;
-                transition: all 0.2s ease;
-            }}
-            
-            .buy-card {{
-                background: rgba(0, 200, 5, 0.08);
-                border-color: rgba(0, 200, 5, 0.3);
-            }}
-            
-            .buy-card:hover {{
-                transform: translateY(-2px);
-                border-color: #00C805;
-                box-shadow: 0 4px 12px rgba(0, 200, 5, 0.2);
-            }}
-            
-            .sell-card {{
-                background: rgba(255, 59, 48, 0.08);
-                border-color: rgba(255, 59, 48, 0.3);
-            }}
-            
-            .sell-card:hover {{
-                transform: translateY(-2px);
-                border-color: #FF3B30;
-                box-shadow: 0 4px 12px rgba(255, 59, 48, 0.2);
-            }}
-            
-            .stat-label {{
-                font-size: 12px;
-                color: var(--text-secondary);
-                text-transform: uppercase;
-                letter-spacing: 0.5px;
-                margin-bottom: 8px;
-                font-weight: 600;
-            }}
-            
-            .stat-value {{
-                font-size: 32px;
-                font-weight: 700;
-                margin-bottom: 6px;
-            }}
-            
-            .stat-value.green {{
-                color: #00C805;
-            }}
-            
-            .stat-value.red {{
-                color: #FF3B30;
-            }}
-            
-            .stat-volume {{
-                font-size: 13px;
-                color: #00bfff;
-                font-weight: 600;
-            }}
-            
-            .volume-chart-panel {{
-                background: var(--card);
-                border-radius: 12px;
-                padding: 20px;
-                margin: 20px;
-                border: 1px solid var(--border);
-            }}
-            
-            .volume-chart-title {{
-                font-size: 18px;
-                font-weight: 700;
-                color: var(--text);
-                margin-bottom: 20px;
-                text-align: center;
-            }}
-            
-            .volume-legend {{
-                display: flex;
-                justify-content: center;
-                gap: 24px;
-                margin-bottom: 20px;
-                font-size: 13px;
-            }}
-            
-            .volume-legend-item {{
-                display: flex;
-                align-items: center;
-                gap: 8px;
-            }}
-            
-            .volume-legend-box {{
-                width: 16px;
-                height: 16px;
-                border-radius: 4px;
-            }}
-            
-            .volume-row {{
-                display: grid;
-                grid-template-columns: 150px 1fr;
-                gap: 20px;
-                margin-bottom: 16px;
-                align-items: center;
-            }}
-            
-            .volume-source {{
-                display: flex;
-                align-items: center;
-                gap: 8px;
-                font-size: 14px;
-            }}
-            
-            .volume-bars {{
-                display: flex;
-                flex-direction: column;
-                gap: 8px;
-            }}
-            
-            .volume-bar-group {{
-                display: flex;
-                align-items: center;
-                gap: 12px;
-            }}
-            
-            .volume-bar {{
-                height: 24px;
-                border-radius: 4px;
-                transition: width 0.3s ease;
-                min-width: 2px;
-            }}
-            
-            .buy-bar {{
-                background: linear-gradient(90deg, #00C805 0%, #00ff9d 100%);
-            }}
-            
-            .sell-bar {{
-                background: linear-gradient(90deg, #FF3B30 0%, #ff6b6b 100%);
-            }}
-            
-            .volume-label {{
-                font-size: 13px;
-                font-weight: 600;
-                min-width: 100px;
-            }}
-            
-            .buy-label {{
-                color: #00C805;
-            }}
-            
-            .sell-label {{
-                color: #FF3B30;
-            }}
-            
-            footer {{
-                text-align: center;
-                padding: 30px 20px;
-                color: var(--text-secondary);
-                font-size: 13px;
-                border-top: 1px solid var(--border);
-                margin-top: 40px;
-            }}
-            
-            @media (max-width: 1024px) {{
-                .main-grid {{
-                    grid-template-columns: 1fr;
-                }}
-                
-                .feed-panel {{
-                    position: relative;
-                    top: 0;
-                }}
-                
-                .price-value {{
-                    font-size: 42px;
-                }}
-            }}
-            
-            @keyframes slideIn {{
-                from {{
-                    opacity: 0;
-                    transform: translateY(10px);
-                }}
-                to {{
-                    opacity: 1;
-                    transform: translateY(0);
-                }}
-            }}
-            
-            .feed-item {{
-                animation: slideIn 0.3s ease;
-            }}
-        </style>
-    </head>
-    <body>
-        <!-- TICKER WITH REMITTANCE RATES -->
-        <div class="ticker-wrapper">
-            <div class="ticker">
-                {ticker_html}
-            </div>
-        </div>
-        
-        <div class="container">
-            <header>
-                <div class="logo">🇪🇹 ETB MARKET <span style="font-size:14px;color:var(--accent);">AI-Powered</span></div>
-                <button class="theme-toggle" onclick="toggleTheme()">
-                    <span id="theme-icon">🌙</span> Theme
-                </button>
-            </header>
-            
-            <div class="main-grid">
-                <div class="left-column">
-                    <div class="price-card">
-                        <div class="price-label">ETB/USD MEDIAN RATE</div>
-                        <div class="price-value">{stats['median']:.2f} <span style="font-size:28px;color:var(--text-secondary);font-weight:400">ETB</span></div>
-                        <div class="price-change {('positive' if price_change > 0 else 'negative' if price_change < 0 else '')}">
-                            <span class="arrow">{arrow}</span>
-                            <span>{abs(price_change):.2f} ETB ({abs(price_change_pct):.2f}%) Today</span>
-                        </div>
-                        <div class="premium-badge">
-                            Black Market Premium: +{prem:.2f}%
-                        </div>
-                    </div>
-                    
-                    <div class="time-selector" style="margin-top: 20px;">
-                        <button class="time-btn active" data-period="live" onclick="filterTrades('live')">LIVE</button>
-                        <button class="time-btn" data-period="1h" onclick="filterTrades('1h')">1H</button>
-                        <button class="time-btn" data-period="1d" onclick="filterTrades('1d')">1D</button>
-                        <button class="time-btn" data-period="1w" onclick="filterTrades('1w')">1W</button>
-                    </div>
-                    
-                    <div class="chart-card">
-                        <div class="chart-title">📊 Live Price Distribution by Exchange</div>
-                        <div id="priceDistChart" class="plotly-chart"></div>
-                    </div>
-                    
-                    <div class="chart-card">
-                        <div class="chart-title">📈 Price Trend & Premium</div>
-                        <div style="display:flex;gap:8px;margin-bottom:15px;flex-wrap:wrap;">
-                            <button class="trend-btn active" data-trend="1h" onclick="filterTrend('1h')">1H</button>
-                            <button class="trend-btn" data-trend="1d" onclick="filterTrend('1d')">1D</button>
-                            <button class="trend-btn" data-trend="1w" onclick="filterTrend('1w')">1W</button>
-                            <button class="trend-btn" data-trend="all" onclick="filterTrend('all')">ALL</button>
-                        </div>
-                        <div id="trendChart" class="plotly-chart"></div>
-                    </div>
-                    
-                    <div class="table-card">
-                        <h3>Market Summary by Exchange</h3>
-                        <table>
-                            <thead>
-                                <tr>
-                                    <th>Source</th>
-                                    <th>Min</th>
-                                    <th>Q1</th>
-                                    <th>Med</th>
-                                    <th>Q3</th>
-                                    <th>Max</th>
-                                    <th>Ads</th>
-                                </tr>
-                            </thead>
-                            <tbody>{table_rows}</tbody>
-                        </table>
-                    </div>
-                </div>
-                
-                <div class="feed-panel">
-                    <div class="feed-header">
-                        <div class="feed-title">Market Activity</div>
-                        <div style="color:var(--text-secondary);font-size:13px;margin-bottom:10px" id="feedStats">
-                            <span style="color:var(--green)">🟢 {buys_count} Buys</span> • <span style="color:var(--red)">🔴 {sells_count} Sells</span>
-                        </div>
-                        <div style="display:flex;gap:8px;margin-top:10px;flex-wrap:wrap;">
-                            <button class="source-filter-btn active" data-source="all" onclick="filterBySource('all')" style="background:var(--accent);color:white;border:none;padding:6px 12px;border-radius:8px;font-size:12px;font-weight:600;cursor:pointer;">
-                                All
-                            </button>
-                            <button class="source-filter-btn" data-source="BINANCE" onclick="filterBySource('BINANCE')" style="background:transparent;color:var(--text-secondary);border:1px solid var(--border);padding:6px 12px;border-radius:8px;font-size:12px;font-weight:600;cursor:pointer;">
-                                🟡 Binance
-                            </button>
-                            <button class="source-filter-btn" data-source="MEXC" onclick="filterBySource('MEXC')" style="background:transparent;color:var(--text-secondary);border:1px solid var(--border);padding:6px 12px;border-radius:8px;font-size:12px;font-weight:600;cursor:pointer;">
-                                🔵 MEXC
-                            </button>
-                            <button class="source-filter-btn" data-source="OKX" onclick="filterBySource('OKX')" style="background:transparent;color:var(--text-secondary);border:1px solid var(--border);padding:6px 12px;border-radius:8px;font-size:12px;font-weight:600;cursor:pointer;">
-                                🟣 OKX
-                            </button>
-                        </div>
-                    </div>
-                    <div class="feed-container" id="feedContainer">
-                        {feed_html}
-                    </div>
-                </div>
-            </div>
-            
-            <!-- Live Market Insight - Supply & Demand by Price -->
-            <div class="chart-card" style="margin:20px 0;">
-                <div class="chart-title">📊 Live Market Insight</div>
-                <div style="display:grid;grid-template-columns:1fr 1fr;gap:30px;">
-                    <!-- Supply (Sell Orders) -->
-                    <div>
-                        <div style="font-size:16px;font-weight:700;color:var(--green);margin-bottom:15px;">Total Market Supply (Sell Orders)</div>
-                        <div style="display:grid;grid-template-columns:120px 80px 1fr;gap:8px;font-size:13px;color:var(--text-secondary);margin-bottom:10px;padding-bottom:8px;border-bottom:1px solid var(--border);">
-                            <span>USD Supply</span>
-                            <span>At Price</span>
-                            <span>Volume by Exchange</span>
-                        </div>
-                        <div id="supplyChart" style="max-height:400px;overflow-y:auto;"></div>
-                    </div>
-                    
-                    <!-- Demand (Buy Orders) -->
-                    <div>
-                        <div style="font-size:16px;font-weight:700;color:var(--red);margin-bottom:15px;">Total Market Demand (Buy Orders)</div>
-                        <div style="display:grid;grid-template-columns:120px 80px 1fr;gap:8px;font-size:13px;color:var(--text-secondary);margin-bottom:10px;padding-bottom:8px;border-bottom:1px solid var(--border);">
-                            <span>USD Demand</span>
-                            <span>At Price</span>
-                            <span>Volume by Exchange</span>
-                        </div>
-                        <div id="demandChart" style="max-height:400px;overflow-y:auto;"></div>
-                    </div>
-                </div>
-                
-                <!-- Legend -->
-                <div style="display:flex;justify-content:center;gap:24px;margin-top:20px;padding-top:15px;border-top:1px solid var(--border);">
-                    <div style="display:flex;align-items:center;gap:8px;">
-                        <div style="width:16px;height:16px;background:#F3BA2F;border-radius:4px;"></div>
-                        <span style="font-size:13px;">🟡 Binance</span>
-                    </div>
-                    <div style="display:flex;align-items:center;gap:8px;">
-                        <div style="width:16px;height:16px;background:#2E55E6;border-radius:4px;"></div>
-                        <span style="font-size:13px;">🔵 MEXC</span>
-                    </div>
-                    <div style="display:flex;align-items:center;gap:8px;">
-                        <div style="width:16px;height:16px;background:#A855F7;border-radius:4px;"></div>
-                        <span style="font-size:13px;">🟣 OKX</span>
-                    </div>
-                </div>
+
+FEED_TRADE_ROW = """
+        <div class="feed-item" data-source="{source}">
+            <div class="feed-icon {icon_class}">
+                {icon}
             </div>
-            
-            <!-- Transaction Statistics -->
-            <div class="stats-panel">
-                <div class="stats-title">Transaction Statistics (Within 24 hrs)</div>
-                
-                <div class="stats-section">
-                    <div class="stats-section-title">🟢 Buy Transactions</div>
-                    <div class="stats-grid">
-                        <div class="stat-card buy-card">
-                            <div class="stat-label">Last 1 Hour</div>
-                            <div class="stat-value green">{hour_buys}</div>
-                            <div class="stat-volume">{hour_buy_volume:,.0f} USDT</div>
-                        </div>
-                        <div class="stat-card buy-card">
-                            <div class="stat-label">Today</div>
-                            <div class="stat-value green">{today_buys}</div>
-                            <div class="stat-volume">{today_buy_volume:,.0f} USDT</div>
-                        </div>
-                        <div class="stat-card buy-card">
-                            <div class="stat-label">Overall (24h)</div>
-                            <div class="stat-value green">{overall_buys}</div>
-                            <div class="stat-volume">{overall_buy_volume:,.0f} USDT</div>
-                        </div>
-                    </div>
+            <div class="feed-content">
+                <div class="feed-meta">
+                    <span>{time_str}</span>
+                    <span>{age_str}</span>
                 </div>
-                
-                <div class="stats-section">
-                    <div class="stats-section-title">🔴 Sell Transactions</div>
-                    <div class="stats-grid">
-                        <div class="stat-card sell-card">
-                            <div class="stat-label">Last 1 Hour</div>
-                            <div class="stat-value red">{hour_sells}</div>
-                            <div class="stat-volume">{hour_sell_volume:,.0f} USDT</div>
-                        </div>
-                        <div class="stat-card sell-card">
-                            <div class="stat-label">Today</div>
-                            <div class="stat-value red">{today_sells}</div>
-                            <div class="stat-volume">{today_sell_volume:,.0f} USDT</div>
-                        </div>
-                        <div class="stat-card sell-card">
-                            <div class="stat-label">Overall (24h)</div>
-                            <div class="stat-value red">{overall_sells}</div>
-                            <div class="stat-volume">{overall_sell_volume:,.0f} USDT</div>
-                        </div>
-                    </div>
+                <div class="feed-text">
+                    {emoji} <span class="feed-user">{user}</span>
+                    <span style="color:{color};font-weight:600">({source})</span>
+                    <b style="color:{action_color}">{action}</b>
+                    <span class="feed-amount">{vol_usd:,.0f} USDT</span>
+                    @ <span class="feed-price">{price:.2f} ETB</span>
                 </div>
             </div>
-            
-            <!-- AI ANALYSIS AT BOTTOM -->
-            {ai_summary_html}
-            
-            <footer>
-                Official Rate: {official:.2f} ETB | Last Update: {timestamp} UTC<br>
-                v42.9 AI-Powered • Market Depth by Price • Premium Tracking 🤖📊
-            </footer>
         </div>
-        
-        <script>
-            const allTrades = {json.dumps(recent_trades)};
-            let currentPeriod = 'live';
-            let currentSource = 'all';
-            let currentTrendPeriod = '1d';
-            
-            const chartData = {chart_data_json};
-            const historyData = {history_data_json};
-            const tradeVolume = {trade_volume_json};
-            const marketDepth = {market_depth_json};
-            
-            // Render Market Depth (Supply/Demand by Price)
-            function renderMarketDepth() {{
-                const colors = {{
-                    'BINANCE': '#F3BA2F',
-                    'MEXC': '#2E55E6', 
-                    'OKX': '#A855F7'
-                }};
-                
-                // Render Supply (Sell Orders) - Green side
-                const supplyContainer = document.getElementById('supplyChart');
-                let supplyHtml = '';
-                const supplyData = marketDepth.supply || [];
-                const maxSupply = Math.max(...supplyData.map(d => d.total), 1);
-                
-                supplyData.slice(0, 15).forEach(item => {{
-                    const binancePct = (item.BINANCE / maxSupply * 100) || 0;
-                    const mexcPct = (item.MEXC / maxSupply * 100) || 0;
-                    const okxPct = (item.OKX / maxSupply * 100) || 0;
-                    
-                    supplyHtml += `
-                        <div style="display:grid;grid-template-columns:120px 80px 1fr;gap:8px;align-items:center;margin-bottom:8px;">
-                            <span style="font-weight:600;color:var(--text);">$${{item.total.toLocaleString(undefined, {{maximumFractionDigits:0}})}}</span>
-                            <span style="color:var(--green);font-weight:600;">${{item.price}} Br</span>
-                            <div style="display:flex;height:20px;border-radius:4px;overflow:hidden;background:var(--border);">
-                                ${{item.BINANCE > 0 ? `<div style="width:${{binancePct}}%;background:#F3BA2F;" title="Binance: $${{item.BINANCE.toLocaleString()}}"></div>` : ''}}
-                                ${{item.MEXC > 0 ? `<div style="width:${{mexcPct}}%;background:#2E55E6;" title="MEXC: $${{item.MEXC.toLocaleString()}}"></div>` : ''}}
-                                ${{item.OKX > 0 ? `<div style="width:${{okxPct}}%;background:#A855F7;" title="OKX: $${{item.OKX.toLocaleString()}}"></div>` : ''}}
-                            </div>
-                        </div>
-                    `;
-                }});
-                
-                if (supplyData.length === 0) {{
-                    supplyHtml = '<div style="text-align:center;padding:20px;color:var(--text-secondary);">No supply data</div>';
-                }}
-                supplyContainer.innerHTML = supplyHtml;
-                
-                // Render Demand (Buy Orders) - Red side
-                const demandContainer = document.getElementById('demandChart');
-                let demandHtml = '';
-                const demandData = marketDepth.demand || [];
-                const maxDemand = Math.max(...demandData.map(d => d.total), 1);
-                
-                demandData.slice(0, 15).forEach(item => {{
-                    const binancePct = (item.BINANCE / maxDemand * 100) || 0;
-                    const mexcPct = (item.MEXC / maxDemand * 100) || 0;
-                    const okxPct = (item.OKX / maxDemand * 100) || 0;
-                    
-                    demandHtml += `
-                        <div style="display:grid;grid-template-columns:120px 80px 1fr;gap:8px;align-items:center;margin-bottom:8px;">
-                            <span style="font-weight:600;color:var(--text);">$${{item.total.toLocaleString(undefined, {{maximumFractionDigits:0}})}}</span>
-                            <span style="color:var(--red);font-weight:600;">${{item.price}} Br</span>
-                            <div style="display:flex;height:20px;border-radius:4px;overflow:hidden;background:var(--border);">
-                                ${{item.BINANCE > 0 ? `<div style="width:${{binancePct}}%;background:#F3BA2F;" title="Binance: $${{item.BINANCE.toLocaleString()}}"></div>` : ''}}
-                                ${{item.MEXC > 0 ? `<div style="width:${{mexcPct}}%;background:#2E55E6;" title="MEXC: $${{item.MEXC.toLocaleString()}}"></div>` : ''}}
-                                ${{item.OKX > 0 ? `<div style="width:${{okxPct}}%;background:#A855F7;" title="OKX: $${{item.OKX.toLocaleString()}}"></div>` : ''}}
-                            </div>
-                        </div>
-                    `;
-                }});
-                
-                if (demandData.length === 0) {{
-                    demandHtml = '<div style="text-align:center;padding:20px;color:var(--text-secondary);">No demand data</div>';
-                }}
-                demandContainer.innerHTML = demandHtml;
-            }}
-            
-            // Filter trend chart by time period
-            function filterTrend(period) {{
-                currentTrendPeriod = period;
-                
-                document.querySelectorAll('.trend-btn').forEach(btn => {{
-                    btn.classList.remove('active');
-                }});
-                document.querySelector(`[data-trend="${{period}}"]`).classList.add('active');
-                
-                renderTrendChart(period);
-            }}
-            
-            function renderTrendChart(period) {{
-                const isDark = document.documentElement.getAttribute('data-theme') !== 'light';
-                const bgColor = isDark ? '#1C1C1E' : '#ffffff';
-                const textColor = isDark ? '#ffffff' : '#1a1a1a';
-                const gridColor = isDark ? '#38383A' : '#e0e0e0';
-                
-                if (!historyData.dates || historyData.dates.length < 2) {{
-                    document.getElementById('trendChart').innerHTML = '<div style="padding:60px;text-align:center;color:var(--text-secondary)"><div style="font-size:48px;margin-bottom:16px">📈</div><div>Collecting trend data...</div></div>';
-                    return;
-                }}
-                
-                // Filter data based on period
-                let filteredDates = historyData.dates;
-                let filteredMedians = historyData.medians;
-                let filteredOfficials = historyData.officials;
-                let filteredPremiums = historyData.premiums || [];
-                
-                const now = new Date();
-                let cutoffTime;
-                
-                switch(period) {{
-                    case '1h':
-                        cutoffTime = new Date(now - 60 * 60 * 1000);
-                        break;
-                    case '1d':
-                        cutoffTime = new Date(now - 24 * 60 * 60 * 1000);
-                        break;
-                    case '1w':
-                        cutoffTime = new Date(now - 7 * 24 * 60 * 60 * 1000);
-                        break;
-                    case 'all':
-                    default:
-                        cutoffTime = new Date(0);
-                }}
-                
-                // Filter arrays
-                const indices = [];
-                filteredDates.forEach((d, i) => {{
-                    if (new Date(d) >= cutoffTime) indices.push(i);
-                }});
-                
-                if (indices.length < 2) {{
-                    document.getElementById('trendChart').innerHTML = '<div style="padding:60px;text-align:center;color:var(--text-secondary)"><div style="font-size:48px;margin-bottom:16px">📈</div><div>Not enough data for this period</div></div>';
-                    return;
-                }}
-                
-                const dates = indices.map(i => filteredDates[i]);
-                const medians = indices.map(i => filteredMedians[i]);
-                const officials = indices.map(i => filteredOfficials[i]);
-                const premiums = indices.map(i => filteredPremiums[i] || 0);
-                
-                const lastIdx = medians.length - 1;
-                const lastMedian = medians[lastIdx];
-                const lastOfficial = officials[lastIdx] || 127;
-                const lastPremium = premiums[lastIdx] || 0;
-                
-                const trendTraces = [];
-                
-                // Official rate (base line)
-                if (officials && officials.some(v => v > 0)) {{
-                    trendTraces.push({{
-                        type: 'scatter',
-                        mode: 'lines',
-                        name: 'Official Rate',
-                        x: dates,
-                        y: officials,
-                        line: {{ color: '#FF9500', width: 2, dash: 'dot' }},
-                        hovertemplate: '<b>Official:</b> %{{y:.2f}} ETB<extra></extra>'
-                    }});
-                }}
-                
-                // Black market rate with fill
-                trendTraces.push({{
-                    type: 'scatter',
-                    mode: 'lines',
-                    name: 'Black Market Rate',
-                    x: dates,
-                    y: medians,
-                    line: {{ color: '#00ff9d', width: 3 }},
-                    fill: 'tonexty',
-                    fillcolor: 'rgba(0, 255, 157, 0.15)',
-                    hovertemplate: '<b>Black Market:</b> %{{y:.2f}} ETB<extra></extra>'
-                }});
-                
-                // Premium on secondary axis
-                trendTraces.push({{
-                    type: 'scatter',
-                    mode: 'lines+markers',
-                    name: 'Premium %',
-                    x: dates,
-                    y: premiums,
-                    line: {{ color: '#FF3B30', width: 2, dash: 'dash' }},
-                    marker: {{ size: 4 }},
-                    yaxis: 'y2',
-                    hovertemplate: '<b>Premium:</b> %{{y:.1f}}%<extra></extra>'
-                }});
-                
-                const allYValues = [...medians, ...officials.filter(v => v > 0)];
-                const minY = Math.floor(Math.min(...allYValues) / 10) * 10 - 10;
-                const maxY = Math.ceil(Math.max(...allYValues) / 10) * 10 + 20;
-                
-                const maxPremium = Math.max(...premiums) + 5;
-                
-                const trendLayout = {{
-                    paper_bgcolor: bgColor,
-                    plot_bgcolor: bgColor,
-                    font: {{ color: textColor, family: '-apple-system, BlinkMacSystemFont, sans-serif' }},
-                    showlegend: true,
-                    legend: {{ orientation: 'h', y: -0.18 }},
-                    margin: {{ l: 60, r: 60, t: 20, b: 70 }},
-                    xaxis: {{
-                        gridcolor: gridColor,
-                        tickformat: period === '1h' ? '%H:%M' : '%m/%d %H:%M'
-                    }},
-                    yaxis: {{
-                        title: 'Rate (ETB)',
-                        gridcolor: gridColor,
-                        zerolinecolor: gridColor,
-                        range: [minY, maxY],
-                        dtick: 10
-                    }},
-                    yaxis2: {{
-                        title: 'Premium (%)',
-                        overlaying: 'y',
-                        side: 'right',
-                        showgrid: false,
-                        range: [0, maxPremium],
-                        ticksuffix: '%'
-                    }},
-                    hovermode: 'x unified',
-                    annotations: [
-                        {{
-                            x: dates[lastIdx],
-                            y: lastMedian,
-                            xanchor: 'left',
-                            yanchor: 'middle',
-                            text: '<b>' + lastMedian.toFixed(1) + '</b>',
-                            font: {{ color: '#00ff9d', size: 12 }},
-                            showarrow: false,
-                            xshift: 10,
-                            bgcolor: 'rgba(0,0,0,0.7)',
-                            borderpad: 4
-                        }},
-                        {{
-                            x: dates[lastIdx],
-                            y: lastPremium,
-                            xanchor: 'left',
-                            yanchor: 'middle',
-                            xref: 'x',
-                            yref: 'y2',
-                            text: '<b>' + lastPremium.toFixed(1) + '%</b>',
-                            font: {{ color: '#FF3B30', size: 11 }},
-                            showarrow: false,
-                            xshift: 10,
-                            bgcolor: 'rgba(0,0,0,0.7)',
-                            borderpad: 4
-                        }}
-                    ]
-                }};
-                
-                Plotly.newPlot('trendChart', trendTraces, trendLayout, {{responsive: true, displayModeBar: false}});
-            }}
-            
-            function initCharts() {{
-                const isDark = document.documentElement.getAttribute('data-theme') !== 'light';
-                const bgColor = isDark ? '#1C1C1E' : '#ffffff';
-                const textColor = isDark ? '#ffffff' : '#1a1a1a';
-                const gridColor = isDark ? '#38383A' : '#e0e0e0';
-                
-                const scatterTraces = [];
-                const colors = {{
-                    'BINANCE': '#F3BA2F',
-                    'MEXC': '#2E55E6', 
-                    'OKX': '#A855F7'
-                }};
-                
-                let allPrices = [];
-                let xIndex = 0;
-                const exchangeOrder = ['BINANCE', 'MEXC', 'OKX'];
-                const exchangeNames = [];
-                
-                for (const exchange of exchangeOrder) {{
-                    const prices = chartData[exchange];
-                    if (prices && prices.length > 0) {{
-                        allPrices = allPrices.concat(prices);
-                        exchangeNames.push(exchange);
-                        
-                        const xPositions = prices.map(() => xIndex + (Math.random() - 0.5) * 0.6);
-                        scatterTraces.push({{
-                            type: 'scatter',
-                            mode: 'markers',
-                            name: exchange,
-                            x: xPositions,
-                            y: prices,
-                            marker: {{ 
-                                color: colors[exchange] || '#00C805',
-                                size: 10,
-                                opacity: 0.75,
-                                line: {{ color: 'rgba(255,255,255,0.5)', width: 1 }}
-                            }},
-                            hovertemplate: '<b>%{{y:.2f}} ETB</b><extra>' + exchange + '</extra>'
-                        }});
-                        xIndex++;
-                    }}
-                }}
-                
-                if (allPrices.length > 0) {{
-                    const sortedAll = [...allPrices].sort((a, b) => a - b);
-                    const overallMedian = sortedAll[Math.floor(sortedAll.length / 2)];
-                    
-                    scatterTraces.push({{
-                        type: 'scatter',
-                        mode: 'lines',
-                        name: 'Median: ' + overallMedian.toFixed(2) + ' ETB',
-                        x: [-0.5, exchangeNames.length - 0.5],
-                        y: [overallMedian, overallMedian],
-                        line: {{ color: '#00ff9d', width: 3, dash: 'solid' }},
-                        hoverinfo: 'name'
-                    }});
-                }}
-                
-                const minPrice = allPrices.length > 0 ? Math.min(...allPrices) - 5 : 130;
-                const maxPrice = allPrices.length > 0 ? Math.max(...allPrices) + 5 : 190;
-                
-                const scatterLayout = {{
-                    paper_bgcolor: bgColor,
-                    plot_bgcolor: bgColor,
-                    font: {{ color: textColor, family: '-apple-system, BlinkMacSystemFont, sans-serif' }},
-                    showlegend: true,
-                    legend: {{ orientation: 'h', y: -0.15 }},
-                    margin: {{ l: 60, r: 30, t: 30, b: 60 }},
-                    yaxis: {{
-                        title: 'Price (ETB)',
-                        gridcolor: gridColor,
-                        zerolinecolor: gridColor,
-                        range: [minPrice, maxPrice],
-                        dtick: 5
-                    }},
-                    xaxis: {{
-                        gridcolor: gridColor,
-                        tickmode: 'array',
-                        tickvals: exchangeNames.map((_, i) => i),
-                        ticktext: exchangeNames,
-                        range: [-0.5, Math.max(exchangeNames.length - 0.5, 0.5)]
-                    }}
-                }};
-                
-                Plotly.newPlot('priceDistChart', scatterTraces, scatterLayout, {{responsive: true, displayModeBar: false}});
-                
-                // Render trend chart with default period
-                renderTrendChart(currentTrendPeriod);
-                
-                // Render market depth
-                renderMarketDepth();
-            }}
-            
-            document.addEventListener('DOMContentLoaded', function() {{
-                initCharts();
-            }});
-            
-            function toggleTheme() {{
-                const html = document.documentElement;
-                const current = html.getAttribute('data-theme');
-                const next = current === 'light' ? 'dark' : 'light';
-                html.setAttribute('data-theme', next);
-                localStorage.setItem('theme', next);
-                document.getElementById('theme-icon').textContent = next === 'light' ? '☀️' : '🌙';
-                initCharts();
-            }}
-            
-            (function() {{
-                const theme = localStorage.getItem('theme') || 'dark';
-                document.documentElement.setAttribute('data-theme', theme);
-                document.getElementById('theme-icon').textContent = theme === 'light' ? '☀️' : '🌙';
-            }})();
-            
-            function filterBySource(source) {{
-                currentSource = source;
-                
-                document.querySelectorAll('.source-filter-btn').forEach(btn => {{
-                    if (btn.dataset.source === source) {{
-                        btn.style.background = 'var(--accent)';
-                        btn.style.color = 'white';
-                        btn.style.border = 'none';
-                    }} else {{
-                        btn.style.background = 'transparent';
-                        btn.style.color = 'var(--text-secondary)';
-                        btn.style.border = '1px solid var(--border)';
-                    }}
-                }});
-                
-                filterTrades(currentPeriod);
-            }}
-            
-            function filterTrades(period) {{
-                currentPeriod = period;
-                
-                document.querySelectorAll('.time-btn').forEach(btn => {{
-                    btn.classList.remove('active');
-                }});
-                document.querySelector(`[data-period="${{period}}"]`).classList.add('active');
-                
-                const now = Date.now() / 1000;
-                let cutoff = 0;
-                
-                switch(period) {{
-                    case '1h': cutoff = now - 3600; break;
-                    case '1d': cutoff = now - 86400; break;
-                    case '1w': cutoff = now - 604800; break;
-                    case 'live':
-                    default: cutoff = 0;
-                }}
-                
-                let filtered = allTrades.filter(t => {{
-                    return t.timestamp > cutoff && 
-                           (t.type === 'buy' || t.type === 'sell' || t.type === 'request');
-                }});
-                
-                if (currentSource !== 'all') {{
-                    filtered = filtered.filter(t => t.source.toUpperCase() === currentSource.toUpperCase());
-                }}
-                
-                renderFeed(filtered);
-                
-                const buys = filtered.filter(t => t.type === 'buy').length;
-                const sells = filtered.filter(t => t.type === 'sell').length;
-                document.getElementById('feedStats').innerHTML = 
-                    '<span style="color:var(--green)">🟢 ' + buys + ' Buys</span> • <span style="color:var(--red)">🔴 ' + sells + ' Sells</span>';
-            }}
-            
-            function renderFeed(trades) {{
-                const container = document.getElementById('feedContainer');
-                
-                if (trades.length === 0) {{
-                    container.innerHTML = '<div style="padding:20px;text-align:center;color:var(--text-secondary)">No trades in this period</div>';
-                    return;
-                }}
-                
-                const sorted = trades.sort((a, b) => b.timestamp - a.timestamp);
-                
-                const html = sorted.map(trade => {{
-                    const date = new Date(trade.timestamp * 1000);
-                    const time = date.toLocaleTimeString('en-US', {{hour: '2-digit', minute: '2-digit'}});
-                    const ageMin = Math.floor((Date.now() / 1000 - trade.timestamp) / 60);
-                    const age = ageMin < 60 ? ageMin + 'm ago' : Math.floor(ageMin/60) + 'h ago';
-                    
-                    let icon, action, color;
-                    
-                    if (trade.type === 'request') {{
-                        const requestType = trade.request_type || 'REQUEST';
-                        const isBuyRequest = requestType.includes('BUY');
-                        icon = isBuyRequest ? '➕' : '➖';
-                        action = requestType;
-                        color = isBuyRequest ? 'var(--green)' : 'var(--red)';
-                    }} else {{
-                        const isBuy = trade.type === 'buy';
-                        icon = isBuy ? '↗' : '↘';
-                        action = isBuy ? 'BOUGHT' : 'SOLD';
-                        color = isBuy ? 'var(--green)' : 'var(--red)';
-                    }}
-                    
-                    let sourceColor, sourceEmoji;
-                    if (trade.source === 'BINANCE') {{
-                        sourceColor = '#F3BA2F';
-                        sourceEmoji = '🟡';
-                    }} else if (trade.source === 'MEXC') {{
-                        sourceColor = '#2E55E6';
-                        sourceEmoji = '🔵';
-                    }} else {{
-                        sourceColor = '#A855F7';
-                        sourceEmoji = '🟣';
-                    }}
-                    
-                    return `
-                        <div class="feed-item">
-                            <div class="feed-icon ${{trade.type}}">
-                                ${{icon}}
-                            </div>
-                            <div class="feed-content">
-                                <div class="feed-meta">
-                                    <span>${{time}}</span>
-                                    <span>${{age}}</span>
-                                </div>
-                                <div class="feed-text">
-                                    ${{sourceEmoji}} <span class="feed-user">${{trade.user.substring(0, 15)}}</span>
-                                    <span style="color:${{sourceColor}};font-weight:600">(${{trade.source}})</span>
-                                    <b style="color:${{color}}">${{action}}</b>
-                                    <span class="feed-amount">${{trade.vol_usd.toFixed(0)}} USDT</span>
-                                    @ <span class="feed-price">${{trade.price.toFixed(2)}} ETB</span>
-                                </div>
-                            </div>
-                        </div>
-                    `;
-                }}).join('');
-                
-                container.innerHTML = html;
-            }}
-            
-            filterTrades('live');
-        </script>
-    </body>
-    </html>
-    """
-    
-    with open(HTML_FILENAME, "w") as f:
-        f.write(html)
+        """
+
+# Feed badge (emoji, color) per exchange; anything else gets the OKX purple
+SOURCE_STYLES = {
+    'BINANCE': ('🟡', '#F3BA2F'),
+    'MEXC': ('🔵', '#2E55E6'),
+}
+DEFAULT_SOURCE_STYLE = ('🟣', '#A855F7')
+
+def clock_12h(timestamp):
+    """Local 'HH:MM AM/PM' without going through strftime"""
+    tm = time.localtime(timestamp)
+    return f"{tm.tm_hour % 12 or 12:02d}:{tm.tm_min:02d} {'PM' if tm.tm_hour >= 12 else 'AM'}"
 
-def generate_feed_html(trades, peg):
+def generate_feed_html(trades, peg, now=None):
     """Server-side initial feed rendering"""
     if not trades:
         return '<div style="padding:20px;text-align:center;color:var(--text-secondary)">Waiting for market activity...</div>'
     
-    html = ""
+    parts = []
     valid_count = 0
+    if now is None:
+        now = time.time()
     
-    for trade in sorted(trades, key=lambda x: x.get('timestamp', 0), reverse=True):
+    for trade in heapq.nlargest(FEED_SERVER_ITEMS, trades, key=lambda x: x.get('timestamp', 0)):
         trade_type = trade.get('type')
         
         if trade_type == 'request':
             request_type = trade.get('request_type', 'REQUEST')
             is_buy_request = 'BUY' in request_type
             
-            ts = datetime.datetime.fromtimestamp(trade.get("timestamp", time.time()))
-            time_str = ts.strftime("%I:%M %p")
-            age_seconds = time.time() - trade.get("timestamp", time.time())
+            time_str = clock_12h(trade.get("timestamp", now))
+            age_seconds = now - trade.get("timestamp", now)
             age_str = f"{int(age_seconds/60)}min ago" if age_seconds >= 60 else f"{int(age_seconds)}s ago"
             
             icon = "📝"
             action_color = "var(--green)" if is_buy_request else "var(--red)"
             
             source = trade.get('source', 'Unknown')
-            if source == 'BINANCE':
-                emoji, color = '🟡', '#F3BA2F'
-            elif source == 'MEXC':
-                emoji, color = '🔵', '#2E55E6'
-            else:
-                emoji, color = '🟣', '#A855F7'
+            emoji, color = SOURCE_STYLES.get(source, DEFAULT_SOURCE_STYLE)
             
-            html += f"""
-        <div class="feed-item request-item" data-source="{source}">
-            <div class="feed-icon" style="background:linear-gradient(135deg,{action_color}22,{action_color}11)">
-                {icon}
-            </div>
-            <div class="feed-content">
-                <div class="feed-meta">
-                    <span>{time_str}</span>
-                    <span>{age_str}</span>
-                </div>
-                <div class="feed-text">
-                    {emoji} <span class="feed-user">{trade.get('user', 'Unknown')[:15]}</span>
-                    <span style="color:{color};font-weight:600">({source})</span>
-                    <b style="color:{action_color}">{request_type}</b>
-                    <span class="feed-amount">{trade.get('vol_usd', 0):,.0f} USDT</span>
-                    @ <span class="feed-price">{trade.get('price', 0):.2f} ETB</span>
-                </div>
-            </div>
-        </div>
-        """
+            parts.append(FEED_REQUEST_ROW.format_map({
+                'source': source, 'icon': icon, 'action': request_type, 'action_color': action_color,
+                'time_str': time_str, 'age_str': age_str, 'emoji': emoji, 'color': color,
+                'user': trade.get('user', 'Unknown')[:15], 'vol_usd': trade.get('vol_usd', 0), 'price': trade.get('price', 0),
+            }))
             continue
         
         if trade_type not in ['buy', 'sell']:
@@ -2850,9 +1683,8 @@ def generate_feed_html(trades, peg):
         valid_count += 1
         is_buy = trade_type == 'buy'
         
-        ts = datetime.datetime.fromtimestamp(trade.get("timestamp", time.time()))
-        time_str = ts.strftime("%I:%M %p")
-        age_seconds = time.time() - trade.get("timestamp", time.time())
+        time_str = clock_12h(trade.get("timestamp", now))
+        age_seconds = now - trade.get("timestamp", now)
         age_str = f"{int(age_seconds/60)}min ago" if age_seconds >= 60 else f"{int(age_seconds)}s ago"
         
         icon = "↗" if is_buy else "↘"
@@ -2861,38 +1693,18 @@ def generate_feed_html(trades, peg):
         action_color = "var(--green)" if is_buy else "var(--red)"
         
         source = trade.get('source', 'Unknown')
-        if source == 'BINANCE':
-            emoji, color = '🟡', '#F3BA2F'
-        elif source == 'MEXC':
-            emoji, color = '🔵', '#2E55E6'
-        else:
-            emoji, color = '🟣', '#A855F7'
+        emoji, color = SOURCE_STYLES.get(source, DEFAULT_SOURCE_STYLE)
         
-        html += f"""
-        <div class="feed-item" data-source="{source}">
-            <div class="feed-icon {icon_class}">
-                {icon}
-            </div>
-            <div class="feed-content">
-                <div class="feed-meta">
-                    <span>{time_str}</span>
-                    <span>{age_str}</span>
-                </div>
-                <div class="feed-text">
-                    {emoji} <span class="feed-user">{trade.get('user', 'Unknown')[:15]}</span>
-                    <span style="color:{color};font-weight:600">({source})</span>
-                    <b style="color:{action_color}">{action}</b>
-                    <span class="feed-amount">{trade.get('vol_usd', 0):,.0f} USDT</span>
-                    @ <span class="feed-price">{trade.get('price', 0):.2f} ETB</span>
-                </div>
-            </div>
-        </div>
-        """
+        parts.append(FEED_TRADE_ROW.format_map({
+            'source': source, 'icon': icon, 'icon_class': icon_class, 'action': action, 'action_color': action_color,
+            'time_str': time_str, 'age_str': age_str, 'emoji': emoji, 'color': color,
+            'user': trade.get('user', 'Unknown')[:15], 'vol_usd': trade.get('vol_usd', 0), 'price': trade.get('price', 0),
+        }))
     
-    if not html:
+    if not parts:
         return '<div style="padding:20px;text-align:center;color:var(--text-secondary)">No recent activity</div>'
     
-    return html
+    return "".join(parts)
 
 
 # --- MAIN ---
@@ -2907,70 +1719,88 @@ def main():
     WAIT_TIME = 15
     all_trades = []
     
-    print(f"   > Snapshot 1/{NUM_SNAPSHOTS}...", file=sys.stderr)
-    prev_snapshot = capture_market_snapshot()
-    save_market_state(prev_snapshot)
-    print("   > Saved baseline snapshot", file=sys.stderr)
+    # Rates don't depend on the snapshots: fetch them in the background while the
+    # burst waits run. The remittance ticker reuses the cached official rate.
+    aux = ThreadPoolExecutor(max_workers=2)
+    f_peg = aux.submit(fetch_usdt_peg)
+    f_rates = aux.submit(lambda: (fetch_official_rate(), fetch_remittance_rates()))
     
-    peg = fetch_usdt_peg() or 1.0
+    print(f"   > Snapshot 1/{NUM_SNAPSHOTS}...", file=sys.stderr)
+    # Round-to-round state stays in memory; it is written to disk once after the burst
+    grouped = capture_market_snapshot()
+    baselined = {source for source, ads in grouped.items() if ads is not None}
+    prev_state = snapshot_state(flatten_snapshot(grouped))
+    print("   > Captured baseline snapshot", file=sys.stderr)
+    
+    # Same budget as the exchange fetches: a hung CoinGecko call must not stall the burst
+    done, _ = wait([f_peg], timeout=FETCH_BUDGET_SECONDS)
+    if not done:
+        print(f"   ⚠️ USDT peg fetch exceeded {FETCH_BUDGET_SECONDS}s budget, using 1.00", file=sys.stderr)
+    peg = (f_peg.result() if done else None) or 1.0
     
     for i in range(2, NUM_SNAPSHOTS + 1):
         print(f"   > ⏳ Waiting {WAIT_TIME}s to catch trades...", file=sys.stderr)
         time.sleep(WAIT_TIME)
         
         print(f"   > Snapshot {i}/{NUM_SNAPSHOTS}...", file=sys.stderr)
-        current_snapshot = capture_market_snapshot()
+        grouped = capture_market_snapshot()
+        fetched = {source for source, ads in grouped.items() if ads is not None}
+        current_snapshot = flatten_snapshot(grouped)
         
-        trades_this_round = detect_real_trades(current_snapshot, peg)
+        # Only sources fetched both last time and now are diffed
+        skip_sources = set(grouped) - (fetched & baselined)
+        trades_this_round = detect_real_trades(current_snapshot, peg, prev_state, skip_sources)
         if trades_this_round:
             all_trades.extend(trades_this_round)
             print(f"   ✅ Round {i-1}: Detected {len(trades_this_round)} trades", file=sys.stderr)
         
-        save_market_state(current_snapshot)
-        prev_snapshot = current_snapshot
+        # A source that timed out keeps its last known state for the next round's diff
+        next_state = snapshot_state(current_snapshot)
+        next_state.update((key, data) for key, data in prev_state.items() if key[0] not in fetched)
+        prev_state = next_state
+        baselined |= fetched
+    
+    save_market_state(prev_state)
     
     # Final snapshot
     print("   > Final snapshot for display...", file=sys.stderr)
-    with ThreadPoolExecutor(max_workers=6) as ex:
-        f_binance = ex.submit(fetch_binance_both_sides)
-        f_mexc = ex.submit(fetch_mexc_both_sides)
-        f_okx = ex.submit(fetch_exchange_both_sides, "okx")
-        f_off = ex.submit(fetch_official_rate)
-        f_remittance = ex.submit(fetch_remittance_rates)
-        
-        bin_ads = f_binance.result() or []
-        mexc_ads = f_mexc.result() or []
-        okx_ads = f_okx.result() or []
-        official = f_off.result() or 0.0
-        remittance_rates = f_remittance.result() or {}
+    grouped_ads = {source: ads or [] for source, ads in capture_market_snapshot().items()}
     
-    print(f"   🔍 Final snapshot:", file=sys.stderr)
-    print(f"      BINANCE: {len(bin_ads)} ads", file=sys.stderr)
-    print(f"      MEXC: {len(mexc_ads)} ads", file=sys.stderr)
-    print(f"      OKX: {len(okx_ads)} ads", file=sys.stderr)
+    # Last result from aux: results_within() also shuts the pool down
+    (rates,) = results_within(aux, [f_rates])
+    official, remittance_rates = rates or (None, None)
+    official = official or 0.0
+    remittance_rates = remittance_rates or {}
     
-    bin_ads = remove_outliers(bin_ads, peg)
-    mexc_ads = remove_outliers(mexc_ads, peg)
-    okx_ads = remove_outliers(okx_ads, peg)
+    print(f"   🔍 Final snapshot:", file=sys.stderr)
+    for source, ads in grouped_ads.items():
+        print(f"      {source}: {len(ads)} ads", file=sys.stderr)
     
-    final_snapshot = bin_ads + mexc_ads + okx_ads
-    grouped_ads = {"BINANCE": bin_ads, "MEXC": mexc_ads, "OKX": okx_ads}
+    grouped_ads = {source: remove_outliers(ads, peg) for source, ads in grouped_ads.items()}
+    final_snapshot = flatten_snapshot(grouped_ads)
     
     if all_trades:
         save_trades(all_trades)
         print(f"   💾 Saved {len(all_trades)} total trades", file=sys.stderr)
     
+    # One clock reading shared by the history row, trade stats, page timestamp and feed ages
+    now = time.time()
+    
     if final_snapshot:
-        all_prices = [x['price'] for x in final_snapshot]
+        # Price arrays are built once per source; the global set is their concatenation
+        source_prices = {source: np.fromiter((a["price"] for a in ads), dtype=np.float64, count=len(ads)) for source, ads in grouped_ads.items()}
+        all_prices = np.concatenate(list(source_prices.values()))
         stats = analyze(all_prices, peg)
+        with ThreadPoolExecutor(max_workers=len(source_prices)) as ex:
+            per_source_stats = dict(zip(source_prices, ex.map(lambda prices: analyze(prices, peg), source_prices.values())))
         
         if stats:
-            save_to_history(stats, official)
+            save_to_history(stats, official, now)
             
-            # Load history and trades for AI
+            # Load history and trades once; shared by the AI summary and the page
             history_data = load_history()
             recent_trades = load_recent_trades()
-            trade_stats = calculate_trade_stats(recent_trades)
+            trade_stats = calculate_trade_stats(recent_trades, now)
             volume_by_exchange = calculate_volume_by_exchange(recent_trades)
             
             # Generate AI summary with forecasting
@@ -2985,10 +1815,13 @@ def main():
             # Generate HTML with AI summary and remittance rates
             update_website_html(
                 stats, official,
-                time.strftime("%Y-%m-%d %H:%M:%S"),
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)),
                 final_snapshot, grouped_ads, peg,
                 ai_summary=ai_summary,
-                remittance_rates=remittance_rates
+                remittance_rates=remittance_rates,
+                per_source_stats=per_source_stats,
+                history_data=history_data,
+                now=now
             )
     else:
         print("⚠️ No ads found", file=sys.stderr)